@@ -0,0 +1,156 @@
+import numpy as np
+
+def get_coarse_corners(num_points:int, coarse_step:int) -> np.array:
+    """Returns the indices of the corners of the coarse cells along an
+    axis of 'num_points' points: every 'coarse_step' points, and the last
+    point, so that the last cell may be narrower than the others."""
+    return np.unique(np.append(np.arange(0, num_points, coarse_step), num_points - 1))
+
+def interpolate_lines(amplitude:np.array, evaluated:np.array) -> np.array:
+    """Returns 'amplitude' with the points of each row which weren't
+    evaluated linearly interpolated between the nearest evaluated points
+    on either side of them in the row. Points without an evaluated point
+    on both sides are left as they are."""
+    num_cols = amplitude.shape[1]
+    columns = np.broadcast_to(np.arange(num_cols), amplitude.shape)
+    previous = np.maximum.accumulate(np.where(evaluated, columns, -1), axis=1)
+    following = np.minimum.accumulate(np.where(evaluated, columns, num_cols)[:, ::-1], axis=1)[:, ::-1]
+
+    between = ~evaluated & (previous >= 0) & (following < num_cols)
+    rows = np.nonzero(between)[0]
+    previous, following = previous[between], following[between]
+    weights = (columns[between] - previous) / (following - previous)
+
+    interpolated = np.copy(amplitude)
+    interpolated[between] = (1-weights)*amplitude[rows, previous] + weights*amplitude[rows, following]
+    return interpolated
+
+def adaptive_meshgrid(evaluate:'function', x_points:np.array, y_points:np.array, coarse_step:int=8, tolerance:float=1e-2, phase_tolerance:float=None) -> 'tuple[np.array, int]':
+    """Returns the amplitude of a complex field over a grid, evaluating
+    the field finely only where it varies quickly.
+
+    The field is first evaluated on the corners of square cells every
+    'coarse_step' points of the grid, with the last row and column of
+    cells clamped to the edge of the grid. Each cell whose corners'
+    amplitudes differ by more than 'tolerance', relative to the largest
+    amplitude of the coarse grid, is split in half along each axis, and
+    the new corners are evaluated. This repeats until the cells are a
+    single point wide. Only points of the grid are ever evaluated.
+
+    The points which were never evaluated are then filled in. The edges
+    of each cell are interpolated linearly between every point evaluated
+    on them, including the corners of smaller neighbouring cells, and the
+    inside of the cell is blended from its four edges, so that the image
+    is continuous across cells of different sizes.
+
+    Features narrower than 'coarse_step' which fall entirely between the
+    corners of a coarse cell can't be detected, so 'coarse_step' should be
+    small enough to resolve the narrowest fringes of the field.
+
+    Parameters
+    ----------
+    evaluate : function(np.array, np.array)
+        A function which returns the complex field at each pair of x and y
+        coordinates of the two passed 1d arrays.
+    x_points, y_points : np.array
+        The evenly spaced x coordinate of each column, and y coordinate of
+        each row of the grid.
+    coarse_step : int, optional
+        The side length of the initial cells, in points of the grid.
+    tolerance : float, optional
+        The largest variation in amplitude allowed across a cell which
+        isn't split, relative to the largest amplitude of the coarse grid.
+    phase_tolerance : float, optional
+        If this is passed, cells whose corners' phases differ by more than
+        this many radians are also split.
+
+    Returns
+    -------
+    tuple (image, num_evaluations)
+        The amplitude at each point of the grid, indexed as [y][x], and the
+        number of points at which 'evaluate' was called.
+    """
+    if coarse_step < 1:
+        raise ValueError("coarse_step must be at least 1")
+
+    x_points, y_points = np.asarray(x_points, dtype=float), np.asarray(y_points, dtype=float)
+    num_rows, num_cols = len(y_points), len(x_points)
+
+    field = np.zeros((num_rows, num_cols), dtype=complex)
+    evaluated = np.zeros((num_rows, num_cols), dtype=bool)
+
+    def evaluate_points(rows, cols):
+        new_points = ~evaluated[rows, cols]
+        rows, cols = rows[new_points], cols[new_points]
+        flat_indices = np.unique(np.ravel_multi_index((rows, cols), field.shape))
+        rows, cols = np.unravel_index(flat_indices, field.shape)
+        field[rows, cols] = evaluate(x_points[cols], y_points[rows])
+        evaluated[rows, cols] = True
+
+    #The corners of the last row and column of cells are clamped to the edge of the grid
+    corner_rows, corner_cols = get_coarse_corners(num_rows, coarse_step), get_coarse_corners(num_cols, coarse_step)
+    coarse_rows, coarse_cols = np.meshgrid(corner_rows, corner_cols, indexing="ij")
+    evaluate_points(coarse_rows.ravel(), coarse_cols.ravel())
+    amplitude_scale = np.max(np.abs(field))
+    if amplitude_scale == 0:
+        amplitude_scale = 1
+
+    #Each cell is described by the indices of its first and last row and column, which are all corners of it
+    row_pairs = (corner_rows[:-1], corner_rows[1:]) if len(corner_rows) > 1 else (corner_rows, corner_rows)
+    col_pairs = (corner_cols[:-1], corner_cols[1:]) if len(corner_cols) > 1 else (corner_cols, corner_cols)
+    row_starts, col_starts = (grid.ravel() for grid in np.meshgrid(row_pairs[0], col_pairs[0], indexing="ij"))
+    row_stops, col_stops = (grid.ravel() for grid in np.meshgrid(row_pairs[1], col_pairs[1], indexing="ij"))
+    leaves = []
+
+    while len(row_starts):
+        corners = field[(row_starts, row_starts, row_stops, row_stops), (col_starts, col_stops, col_starts, col_stops)]
+        corner_amplitudes = np.abs(corners)
+        refine = (np.max(corner_amplitudes, axis=0) - np.min(corner_amplitudes, axis=0)) > tolerance * amplitude_scale
+        if phase_tolerance is not None:
+            relative_phases = np.angle(corners * np.conj(corners[0]))
+            refine |= (np.max(relative_phases, axis=0) - np.min(relative_phases, axis=0)) > phase_tolerance
+        #Cells with no points between their corners can't be split
+        refine &= (row_stops - row_starts > 1) | (col_stops - col_starts > 1)
+
+        leaves.append((row_starts[~refine], col_starts[~refine], row_stops[~refine], col_stops[~refine]))
+        row_starts, col_starts, row_stops, col_stops = row_starts[refine], col_starts[refine], row_stops[refine], col_stops[refine]
+        row_middles, col_middles = (row_starts + row_stops) // 2, (col_starts + col_stops) // 2
+
+        #The midpoints of each edge and the center of each split cell
+        evaluate_points(np.concatenate((row_starts, row_middles, row_middles, row_middles, row_stops)),
+                        np.concatenate((col_middles, col_starts, col_middles, col_stops, col_middles)))
+
+        #Each cell is split in half along each axis it is more than one point wide in
+        row_split, col_split = row_stops - row_starts > 1, col_stops - col_starts > 1
+        first_row_stops, first_col_stops = np.where(row_split, row_middles, row_stops), np.where(col_split, col_middles, col_stops)
+        children = ((row_starts, col_starts, first_row_stops, first_col_stops, np.ones(len(row_starts), dtype=bool)),
+                    (row_starts, col_middles, first_row_stops, col_stops, col_split),
+                    (row_middles, col_starts, row_stops, first_col_stops, row_split),
+                    (row_middles, col_middles, row_stops, col_stops, row_split & col_split))
+        row_starts, col_starts, row_stops, col_stops = (np.concatenate([child[i][child[4]] for child in children]) for i in range(4))
+
+    amplitude = np.abs(field)
+    #The edges of every cell are interpolated along the rows and columns between the points evaluated on them, including
+    #those evaluated by smaller neighbouring cells, so that neighbouring cells of different sizes agree on their shared edge
+    row_lines = interpolate_lines(amplitude, evaluated)
+    col_lines = interpolate_lines(amplitude.T, evaluated.T).T
+
+    image = np.copy(amplitude)
+    leaf_row_starts, leaf_col_starts, leaf_row_stops, leaf_col_stops = (np.concatenate(parts) for parts in zip(*leaves))
+    leaf_heights, leaf_widths = leaf_row_stops - leaf_row_starts, leaf_col_stops - leaf_col_starts
+    #Leaves of the same shape are filled together
+    for height, width in set(zip(leaf_heights.tolist(), leaf_widths.tolist())):
+        same_shape = (leaf_heights == height) & (leaf_widths == width)
+        top, left = leaf_row_starts[same_shape][:, np.newaxis, np.newaxis], leaf_col_starts[same_shape][:, np.newaxis, np.newaxis]
+        bottom, right = top + height, left + width
+        row_offsets, col_offsets = np.arange(height+1)[np.newaxis, :, np.newaxis], np.arange(width+1)[np.newaxis, np.newaxis, :]
+        rows, cols = top + row_offsets, left + col_offsets
+        row_weights, col_weights = row_offsets / max(height, 1), col_offsets / max(width, 1)
+
+        #A Coons patch, which blends the four interpolated edges of the cell, and so matches each of them exactly
+        edges = (1-row_weights)*row_lines[top, cols] + row_weights*row_lines[bottom, cols] + (1-col_weights)*col_lines[rows, left] + col_weights*col_lines[rows, right]
+        bilinear = ((1-row_weights)*(1-col_weights)*amplitude[top, left] + (1-row_weights)*col_weights*amplitude[top, right]
+                    + row_weights*(1-col_weights)*amplitude[bottom, left] + row_weights*col_weights*amplitude[bottom, right])
+        image[rows, cols] = np.where(evaluated[rows, cols], amplitude[rows, cols], edges - bilinear)
+
+    return image, int(np.count_nonzero(evaluated))
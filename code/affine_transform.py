@@ -0,0 +1,87 @@
+import numpy as np
+
+class AffineTransform:
+    """ An affine transform of 3d points, or a batch of them, stored as a
+    4x4 matrix in homogeneous coordinates.
+
+    Transforms are built by chaining rotations and translations, which
+    are applied in the order they are added. Each step only multiplies
+    the 4x4 matrices, so however many steps there are, the points are
+    transformed in a single pass by 'apply'.
+
+    Attributes
+    ----------
+    matrix : np.array
+        A (..., 4, 4) array of transform matrices. The leading dimensions
+        are the batch of transforms.
+    """
+
+    def __init__(self, matrix:np.array=None) -> None:
+        """A constructor for the AffineTransform class.
+
+        Parameters
+        ----------
+        matrix : np.array, optional
+            A (..., 4, 4) array of transform matrices. This defaults to the
+            identity transform.
+        """
+        self.matrix = np.eye(4) if matrix is None else np.asarray(matrix, dtype=float)
+
+    def then(self, matrix:np.array) -> 'AffineTransform':
+        """Returns this transform followed by the (..., 4, 4) transform
+        'matrix'. Batches are broadcast against each other."""
+        return AffineTransform(np.asarray(matrix, dtype=float) @ self.matrix)
+
+    def translate(self, offset:np.array) -> 'AffineTransform':
+        """Returns this transform followed by a translation by the
+        (..., 3) 'offset'."""
+        offset = np.asarray(offset, dtype=float)
+        translation = np.broadcast_to(np.eye(4), offset.shape[:-1] + (4, 4)).copy()
+        translation[..., :3, 3] = offset
+        return self.then(translation)
+
+    def rotate(self, rotation_matrix:np.array, center_point:np.array=(0, 0, 0)) -> 'AffineTransform':
+        """Returns this transform followed by a rotation around
+        'center_point'.
+
+        Parameters
+        ----------
+        rotation_matrix : np.array
+            A (..., 3, 3) array of rotation matrices, such as those made by
+            the 'rotations' module.
+        center_point : np.array, optional
+            A (..., 3) array of the points to rotate around.
+
+        Returns
+        -------
+        AffineTransform
+            The composed transform.
+        """
+        rotation_matrix = np.asarray(rotation_matrix, dtype=float)
+        center_point = np.asarray(center_point, dtype=float)
+        batch_shape = np.broadcast_shapes(rotation_matrix.shape[:-2], center_point.shape[:-1])
+
+        #A rotation around a point is a translation of the point to the origin, the rotation, and a translation back
+        rotation = np.zeros(batch_shape + (4, 4))
+        rotation[..., :3, :3] = rotation_matrix
+        rotation[..., :3, 3] = center_point - (rotation_matrix @ center_point[..., np.newaxis])[..., 0]
+        rotation[..., 3, 3] = 1
+        return self.then(rotation)
+
+    def apply(self, points:np.array) -> np.array:
+        """Returns a copy of 'points' transformed by every transform of the
+        batch.
+
+        Parameters
+        ----------
+        points : np.array
+            A (..., points, 3) array of the points to transform, whose
+            leading dimensions are broadcast against the batch.
+
+        Returns
+        -------
+        np.array
+            A (..., points, 3) array of the transformed points.
+        """
+        points = np.asarray(points, dtype=float)
+        return points @ np.swapaxes(self.matrix[..., :3, :3], -1, -2) + self.matrix[..., np.newaxis, :3, 3]
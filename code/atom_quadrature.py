@@ -0,0 +1,201 @@
+import functools
+import warnings
+
+import numpy as np
+
+from thomson_scattering import analytic_radial_scattering_from_atom, radius_by_shell, scattered_field_ufunc
+
+class AtomQuadrature:
+    """ A fixed-node quadrature rule for the integral over an atom's
+    electron cloud computed by 'thomson_scattering.scattering_from_atom'.
+
+    The integral is over the distance r of the electron from the atom,
+    from 0 to infinity, and the angle of observation θ, from 0 to π. The
+    density of the electron cloud decays as exp(-2r/a), where a is the
+    radius of the electron shell, so the radial integral uses
+    Gauss-Laguerre nodes, which integrate this decay exactly, and the
+    angular integral uses Gauss-Legendre nodes. The nodes and weights are
+    computed once when the rule is made, and the complex integrand is
+    evaluated on the whole tensor grid of nodes, for every wavelength and
+    time of a batch, in a single pass of the compiled
+    'thomson_scattering.scattered_field_ufunc'.
+
+    The scattered field is proportional to cos(θ), so the integrand 
+    separates into a radial part and the angular part cos(θ)sin(θ), 
+    whose integral over 0..π is zero. The field scattered by the whole
+    atom, and so every value the rule returns, is therefore zero up to
+    rounding, as in 'thomson_scattering.analytic_scattering_from_atom'.
+    'radial_integral' returns the radial part alone, which isn't zero,
+    and which the accuracy of the rule is measured against.
+
+    Attributes
+    ----------
+    electron_shell : {"k", "l"}
+        The electron shell of the scattering electron.
+    radii : np.array
+        The radial nodes, in nanometers.
+    angles : np.array
+        The angular nodes, in radians.
+    radial_weights : np.array
+        The weight of each radial node, including the density of the
+        electron cloud.
+    angular_weights : np.array
+        The weight of each angular node, including sin(θ).
+    weights : np.array
+        A (radial nodes, angular nodes) array of the weight of each node
+        of the grid, including the parts of the integrand which don't
+        depend on the offset, the wavelength or the time.
+    """
+
+    max_grid_size = 2**20
+    """ The largest number of values of the integrand evaluated at once """
+    max_radial_nodes = 180
+    """ Numpy's Gauss-Laguerre weights underflow to 0 with more nodes """
+
+    def __init__(self, electron_shell:str='k', num_radial_nodes:int=64, num_angular_nodes:int=16) -> None:
+        """A constructor for the AtomQuadrature class.
+
+        Parameters
+        ----------
+        electron_shell : {"k", "l"}, optional
+            The electron shell of the scattering electron.
+        num_radial_nodes, num_angular_nodes : int, optional
+            The number of Gauss-Laguerre nodes in the radial direction,
+            and of Gauss-Legendre nodes in the angular direction.
+
+        Notes
+        -----
+        The rule converges slowly when the scattered light oscillates
+        many times over the radius of the shell. With the default nodes,
+        the 'radial_integral' of the k shell is accurate to about 1e-12 
+        at every wavelength above 0.05nm, and that of the l shell at 
+        every wavelength above 0.25nm. Below that, use 
+        'integrate_with_error' to check the result.
+
+        See Also
+        --------
+        get_atom_quadrature :
+            Returns a cached AtomQuadrature, so that the nodes are only
+            computed once per shell.
+        """
+        self.electron_shell = electron_shell
+        self.num_radial_nodes = num_radial_nodes
+        self.num_angular_nodes = num_angular_nodes
+        electron_distance = radius_by_shell[electron_shell]
+
+        #The radial nodes are scaled from the weight exp(-x) to the density's exp(-2r/a)
+        laguerre_nodes, laguerre_weights = np.polynomial.laguerre.laggauss(num_radial_nodes)
+        self.radii = laguerre_nodes * electron_distance/2
+        laguerre_weights = laguerre_weights * electron_distance/2
+
+        #The angular nodes are scaled from [-1, 1] to [0, π]
+        legendre_nodes, legendre_weights = np.polynomial.legendre.leggauss(num_angular_nodes)
+        self.angles = (legendre_nodes + 1) * np.pi/2
+        legendre_weights = legendre_weights * np.pi/2
+
+        #4πr² times the electron probability, without the exp(-2r/a) the nodes already account for
+        positional_probability = 4 * self.radii**2 / electron_distance**3
+        self.radial_weights = laguerre_weights * positional_probability
+        self.angular_weights = legendre_weights * np.sin(self.angles)
+        self.weights = self.radial_weights[:, np.newaxis] * self.angular_weights[np.newaxis, :]
+
+    def __call__(self, incident_field_strength:float, wavelength:float, observation_time:float, offset:float=0) -> np.array:
+        """Returns the field scattered by the atom, as computed by
+        'scattering_from_atom'.
+
+        Parameters
+        ----------
+        incident_field_strength : float or np.array
+            The amplitude of the incident light's electric field, in
+            volts/meter.
+        wavelength : float or np.array
+            The wavelength of the incident light, in nanometers.
+        observation_time : float or np.array
+            The time at which the scattered light is observed, in seconds.
+        offset : float or np.array, optional
+            The distance between the atom and the point of observation,
+            in nanometers.
+
+        Returns
+        -------
+        complex or np.array of complex
+            The scattered field, with the broadcast shape of the
+            parameters. It is zero up to rounding, see 'AtomQuadrature'.
+        """
+        return self._integrate(self.angles, self.weights, incident_field_strength, wavelength, observation_time, offset)
+
+    def radial_integral(self, incident_field_strength:float, wavelength:float, observation_time:float, offset:float=0) -> np.array:
+        """Returns the radial part of the integral of '__call__', which
+        is the field the atom would scatter if the angular part were one,
+        as computed by 
+        'thomson_scattering.analytic_radial_scattering_from_atom'. The
+        parameters are those of '__call__'."""
+        return self._integrate(np.zeros(1), self.radial_weights[:, np.newaxis], incident_field_strength, wavelength, observation_time, offset)
+
+    def _integrate(self, angles:np.array, weights:np.array, incident_field_strength:float, wavelength:float, observation_time:float, offset:float) -> np.array:
+        """Sums the integrand at the radial nodes and the passed angles,
+        times the passed (radial nodes, angles) weights."""
+        #The broadcast arrays are copied, as numba warns about passing the read-only views of np.broadcast_arrays
+        parameters = [np.array(parameter) for parameter in np.broadcast_arrays(*(np.asarray(parameter, dtype=float) for parameter in (incident_field_strength, wavelength, observation_time, offset)))]
+        batch_shape = parameters[0].shape
+        #Each parameter gets two trailing dimensions, for the radial and the angular nodes
+        parameters = [parameter.reshape((-1, 1, 1)) for parameter in parameters]
+
+        integral = np.zeros(parameters[0].shape[0], dtype=complex)
+        #The batch is evaluated in chunks, so that the grid of the integrand holds at most 'max_grid_size' values
+        chunk_size = max(1, self.max_grid_size // weights.size)
+        for start in range(0, len(integral), chunk_size):
+            incident_field_strength, wavelength, observation_time, offset = (parameter[start:start+chunk_size] for parameter in parameters)
+            distances = self.radii[np.newaxis, :, np.newaxis] + offset
+            field = scattered_field_ufunc(angles[np.newaxis, np.newaxis, :], distances*1e-9, observation_time, wavelength*1e-9, incident_field_strength)
+            integral[start:start+chunk_size] = np.sum(field * distances**2 * weights, axis=(1, 2))
+        return integral.reshape(batch_shape)[()]
+
+    def get_refined(self) -> 'AtomQuadrature':
+        """Returns the rule for the same shell with twice as many nodes in
+        each direction, up to 'max_radial_nodes' radial nodes."""
+        return get_atom_quadrature(self.electron_shell, min(2*self.num_radial_nodes, self.max_radial_nodes), 2*self.num_angular_nodes)
+
+    def integrate_with_error(self, incident_field_strength:float, wavelength:float, observation_time:float, offset:float=0) -> 'tuple[np.array, np.array]':
+        """Returns the scattered field, and an estimate of its error.
+
+        The field is computed with this rule and with the refined rule of
+        'get_refined'. The refined field is returned, and the difference
+        between the two is its error, which overestimates the error of 
+        the refined field as long as the rules converge. As the field is
+        zero, the error is relative to the magnitude of the refined
+        rule's 'radial_integral', the field the atom would scatter if 
+        the angular part didn't cancel.
+
+        Returns
+        -------
+        tuple (field, error)
+            The scattered field, see '__call__', and the estimated
+            relative error of each value.
+        """
+        refined_rule = self.get_refined()
+        field = self(incident_field_strength, wavelength, observation_time, offset)
+        refined_field = refined_rule(incident_field_strength, wavelength, observation_time, offset)
+        radial_integral = refined_rule.radial_integral(incident_field_strength, wavelength, observation_time, offset)
+        return refined_field, np.abs(refined_field - field) / np.abs(radial_integral)
+
+@functools.lru_cache(maxsize=16)
+def get_atom_quadrature(electron_shell:str='k', num_radial_nodes:int=64, num_angular_nodes:int=16) -> AtomQuadrature:
+    """Returns an AtomQuadrature with the passed parameters, which is only
+    made the first time it is requested."""
+    return AtomQuadrature(electron_shell, num_radial_nodes, num_angular_nodes)
+
+def check_atom_quadrature():
+    with warnings.catch_warnings():
+        warnings.simplefilter("error") #The compiled integrand shouldn't warn about its inputs
+        for electron_shell, wavelengths in (('k', (0.05, 0.1, 1)), ('l', (0.25, 1))):
+            quadrature = get_atom_quadrature(electron_shell)
+            #The angular part of the integral is zero, and the radial part is the closed form
+            assert abs(np.sum(quadrature.angular_weights * np.cos(quadrature.angles))) < 1e-15
+            wavelength, observation_time, offset = np.array(wavelengths)[:, np.newaxis, np.newaxis], np.array([0, 1e-18])[:, np.newaxis], np.array([0, 0.05, 10])
+            radial_integral = analytic_radial_scattering_from_atom(1, wavelength, observation_time, electron_shell, offset)
+            assert np.allclose(quadrature.radial_integral(1, wavelength, observation_time, offset), radial_integral, rtol=1e-9, atol=0)
+            #So the field is the zero of their product, up to rounding relative to the radial part
+            field, error = quadrature.integrate_with_error(1, wavelength, observation_time, offset)
+            assert np.all(np.abs(field) < 1e-12*np.abs(radial_integral))
+            assert np.all(error < 1e-12)
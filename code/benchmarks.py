@@ -0,0 +1,232 @@
+""" Benchmarks of the compute heavy parts of the simulation. Run this
+script with the name of a benchmark to run just that benchmark, or with
+no arguments to run all of them. """
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+def time_function(func:'function', repeats:int=3) -> float:
+    """Returns the shortest time, in seconds, out of 'repeats' calls of
+    'func'."""
+    times = []
+    for i in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def benchmark_lattice_phasor_sum(grid_side:int=300, scalar_grid_side:int=5):
+    """Compares the scalar, numpy and numba evaluations of the field
+    scattered by the points of a DiffractionPlot."""
+    from diffraction_plot import DiffractionPlot
+    import diffraction_kernels
+
+    plot = DiffractionPlot(0.070710678118)
+    atom_phasors = plot.get_atom_phasors(0.785398, 0.1)
+    xx, yy = np.meshgrid(np.linspace(5e8, 1.5e9, grid_side), np.linspace(5e8, 1.5e9, grid_side))
+    observation_points = np.stack((xx, yy), axis=-1)
+
+    diffraction_kernels.calculate_diffraction_field(plot.points, atom_phasors, observation_points[:1, :1], 0.1) #Compile the kernel before timing it
+
+    scalar_points = observation_points[:scalar_grid_side, :scalar_grid_side].reshape((-1, 2))
+    scalar_time = time_function(lambda: [plot.calculate_diffraction(point, 0.785398, 0.1) for point in scalar_points], repeats=1)
+    numpy_time = time_function(lambda: plot.calculate_diffraction_field(xx, yy, 0.785398, 0.1))
+    numba_time = time_function(lambda: diffraction_kernels.calculate_diffraction_field(plot.points, atom_phasors, observation_points, 0.1))
+
+    scalar_rate = len(scalar_points) / scalar_time
+    numpy_rate = grid_side**2 / numpy_time
+    numba_rate = grid_side**2 / numba_time
+    print(f"Lattice phasor sum, {len(plot.points)} atoms:")
+    print(f"    scalar: {scalar_rate:.4g} points/second")
+    print(f"    numpy:  {numpy_rate:.4g} points/second")
+    print(f"    numba:  {numba_rate:.4g} points/second ({numba_rate/scalar_rate:.1f}x scalar, {numba_rate/numpy_rate:.1f}x numpy)")
+
+def construct_lattice_by_loop(shape:'tuple[int, int, int]', unit_cell) -> 'tuple[np.array, np.array]':
+    """Returns the points and edge points of a lattice, built one unit 
+    cell at a time the way CrystalLattice originally built them."""
+    all_points = np.zeros((np.prod(shape), unit_cell.num_points, 3))
+    edge_points = np.zeros((np.prod(shape), unit_cell.num_edge_points, 3))
+
+    current_lattice_index = 0
+    for x in range(1, shape[0]+1):
+        for y in range(1, shape[1]+1):
+            for z in range(1, shape[2]+1):
+                all_points[current_lattice_index] = unit_cell.get_shifted_points(x, y, z)
+                edge_points[current_lattice_index] = unit_cell.get_shifted_points(x, y, z, points="edge")
+                current_lattice_index += 1
+    return all_points, edge_points
+
+def benchmark_lattice_construction(sizes:tuple=(10, 25, 50, 100)):
+    """Compares building a CrystalLattice with the vectorized constructor
+    against building it one unit cell at a time."""
+    from crystal_latttice import CrystalLattice
+    from unit_cell import UnitCell
+
+    unit_cell = UnitCell.face_centered_cubic(1)
+    print("Lattice construction, face centered cubic:")
+    for size in sizes:
+        shape = (size, size, size)
+        lattice = CrystalLattice(shape, unit_cell)
+        vectorized_time = time_function(lambda: CrystalLattice(shape, unit_cell), repeats=1)
+
+        if size <= 50:
+            loop_time = time_function(lambda: construct_lattice_by_loop(shape, unit_cell), repeats=1)
+            all_points, edge_points = construct_lattice_by_loop(shape, unit_cell)
+            assert np.array_equal(all_points, lattice.all_points) and np.array_equal(edge_points, lattice.edge_points)
+            print(f"    {size}³: loop {loop_time:.3g}s, vectorized {vectorized_time:.3g}s ({loop_time/vectorized_time:.0f}x)")
+        else:
+            print(f"    {size}³: vectorized {vectorized_time:.3g}s")
+
+def benchmark_lazy_lattice(size:int=100, block_size:int=2**16):
+    """Compares the peak memory and time of slicing a plane out of a
+    CrystalLattice against streaming it out of a LazyCrystalLattice."""
+    import tracemalloc
+    from crystal_latttice import CrystalLattice, LazyCrystalLattice
+    from unit_cell import UnitCell
+
+    unit_cell = UnitCell.face_centered_cubic(1)
+    shape = (size, size, size)
+    print(f"Slicing a {size}³ face centered cubic lattice:")
+    for name, make_lattice in (("eager", lambda: CrystalLattice(shape, unit_cell)), ("lazy", lambda: LazyCrystalLattice(shape, unit_cell, block_size))):
+        tracemalloc.start()
+        start = time.perf_counter()
+        points_2d = make_lattice().get_2d_slice('z', size//2)
+        elapsed = time.perf_counter() - start
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"    {name}: {elapsed:.3g}s, peak {peak_bytes/2**20:.1f} MiB, {len(points_2d)} points")
+
+def benchmark_unit_conversion(size:int=10**6):
+    """Compares converting an array of wavelengths with 'convert_array'
+    against calling 'convert' on each wavelength."""
+    import wave_conversions as wc
+
+    wavelengths = np.random.default_rng(0).uniform(1e-11, 1e-6, size)
+    for unit in ("wavenumber", "photon_energy"):
+        wc.convert(1e-9, "wavelength", unit), wc.convert_array(wavelengths[:1], "wavelength", unit) #Compile both before timing
+        loop_time = time_function(lambda: [wc.convert(wavelength, "wavelength", unit) for wavelength in wavelengths], repeats=1)
+        array_time = time_function(lambda: wc.convert_array(wavelengths, "wavelength", unit))
+        assert np.array_equal(np.array([wc.convert(wavelength, "wavelength", unit) for wavelength in wavelengths[:1000]]), wc.convert_array(wavelengths[:1000], "wavelength", unit))
+        print(f"Wavelength to {unit}, {size} values: loop {loop_time:.3g}s, array {array_time:.3g}s ({loop_time/array_time:.0f}x)")
+
+headless_modules = ("thomson_scattering", "wave_conversions", "crystal_latttice", "unit_cell", "geometry_utils")
+""" The modules of the compute core, which should import quickly and
+without a display """
+
+gui_modules = ("matplotlib.pyplot", "mayavi", "astropy", "PyQt5", "PySide2", "tkinter")
+""" The modules the compute core shouldn't import """
+
+def benchmark_import_time(budget:float=1.5, repeats:int=3):
+    """Measures the time to import each module of the compute core in a
+    fresh interpreter, and checks that it is within 'budget' seconds and
+    doesn't import any of 'gui_modules'."""
+    measure_import = ("import sys, time\n"
+                      "start = time.perf_counter()\n"
+                      "import {module}\n"
+                      "print(time.perf_counter() - start)\n"
+                      "print(','.join(name for name in {gui_modules!r} if name in sys.modules))")
+    #The display is removed, as it would be on a headless render node
+    environment = {name: value for name, value in os.environ.items() if name not in ("DISPLAY", "WAYLAND_DISPLAY")}
+
+    print(f"Import time, budget {budget:.3g}s:")
+    over_budget = []
+    for module in headless_modules:
+        times = []
+        for i in range(repeats):
+            output = subprocess.run([sys.executable, "-c", measure_import.format(module=module, gui_modules=gui_modules)], capture_output=True, text=True, check=True,
+                                    cwd=os.path.dirname(os.path.abspath(__file__)), env=environment).stdout.splitlines()
+            times.append(float(output[0]))
+            imported_gui_modules = output[1] if len(output) > 1 else ""
+
+        print(f"    {module}: {min(times):.3g}s" + (f", imports {imported_gui_modules}" if imported_gui_modules else ""))
+        if min(times) > budget or imported_gui_modules:
+            over_budget.append(module)
+
+    assert not over_budget, f"{', '.join(over_budget)} exceeded the import budget"
+
+def benchmark_first_result(repeats:int=3):
+    """Measures the time from starting a fresh interpreter to the first
+    result of the compiled kernels, with an empty numba cache and with a
+    cache filled by 'warmup.py'."""
+    first_result = ("import time\n"
+                    "start = time.perf_counter()\n"
+                    "import numpy as np\n"
+                    "import thomson_scattering, diffraction_kernels\n"
+                    "thomson_scattering.scattering_by_angle(np.linspace(0, 1, 100), 1e-6, 0, 1e-10, 1)\n"
+                    "thomson_scattering.electron_probability(np.linspace(0, 0.1, 100), 'k')\n"
+                    "diffraction_kernels.lattice_phasor_sum(np.zeros((10, 2)), np.ones(10, dtype=complex), np.ones((100, 2)), 1.0, 0.02)\n"
+                    "print(time.perf_counter() - start)")
+    code_directory = os.path.dirname(os.path.abspath(__file__))
+    cache_directory = tempfile.mkdtemp()
+    environment = dict(os.environ, NUMBA_CACHE_DIR=cache_directory)
+    run = lambda code: float(subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=code_directory, env=environment).stdout)
+
+    try:
+        cold_times = []
+        for i in range(repeats):
+            shutil.rmtree(cache_directory)
+            os.makedirs(cache_directory)
+            cold_times.append(run(first_result))
+
+        subprocess.run([sys.executable, "warmup.py"], capture_output=True, check=True, cwd=code_directory, env=environment)
+        warm_times = [run(first_result) for i in range(repeats)]
+    finally:
+        shutil.rmtree(cache_directory, ignore_errors=True)
+
+    print(f"Startup to first result: empty cache {min(cold_times):.3g}s, after warmup {min(warm_times):.3g}s ({min(cold_times)/min(warm_times):.1f}x)")
+
+def benchmark_atom_quadrature(num_wavelengths:int=100, num_times:int=10, num_dblquad:int=20):
+    """Compares 'scattering_from_atom' with dblquad, once per wavelength,
+    against the fixed-node quadrature of a whole batch of wavelengths and
+    times."""
+    import thomson_scattering
+    from atom_quadrature import get_atom_quadrature
+
+    wavelengths = np.linspace(0.2, 1, num_wavelengths)
+    times = np.linspace(0, 1e-18, num_times)
+    quadrature = get_atom_quadrature('k')
+    quadrature(1, wavelengths[:1], 0) #Compile before timing
+    dblquad_time = time_function(lambda: [thomson_scattering.scattering_from_atom(1, wavelength, 0, 'k', 0.05) for wavelength in wavelengths[:num_dblquad]], repeats=1) / num_dblquad
+    quadrature_time = time_function(lambda: quadrature(1, wavelengths[:, np.newaxis], times, 0.05)) / (num_wavelengths*num_times)
+
+    field, error = quadrature.integrate_with_error(1, wavelengths[:, np.newaxis], times, 0.05)
+    print(f"Scattering from an atom, per value: dblquad {dblquad_time:.3g}s, quadrature {quadrature_time:.3g}s ({dblquad_time/quadrature_time:.0f}x), "
+          f"estimated error {np.max(error):.2g} of the radial integral")
+
+def benchmark_parallel_render(worker_counts:tuple=(1, 2, 4), lattice_side:int=30, grid_side:int=100):
+    """Times the same grid with a ParallelFieldEvaluator of each of
+    'worker_counts' processes, against a single process evaluating it 
+    without a pool. The pools are started and warmed up before timing,
+    as they are when a sweep reuses one evaluator."""
+    from crystal_latttice import CrystalLattice
+    from unit_cell import UnitCell
+    import diffraction_plot
+    from parallel_render import ParallelFieldEvaluator
+
+    points = diffraction_plot.get_2d_lattice_points(CrystalLattice((lattice_side, 1, lattice_side), UnitCell.simple_cubic(1)), 'y', 1) * 0.070710678118
+    atom_phasors = np.ones(len(points), dtype=complex)
+    x_points = y_points = np.linspace(5e8, 1.5e9, grid_side)
+    xx, yy = np.meshgrid(x_points, y_points)
+    observation_points = np.stack((xx, yy), axis=-1)
+
+    serial_time = time_function(lambda: diffraction_plot.calculate_diffraction_field(points, atom_phasors, observation_points, 0.1, form_factor="analytic"), repeats=1)
+    print(f"Parallel render, {len(points)} atoms, {grid_side}x{grid_side} grid, {os.cpu_count()} cpus:")
+    print(f"    serial:    {serial_time:.3g}s")
+    for workers in worker_counts:
+        with ParallelFieldEvaluator(points, workers) as evaluator:
+            evaluate = lambda: evaluator.calculate_diffraction_field(atom_phasors, x_points, y_points, 0.1)
+            evaluate() #Start the workers before timing
+            parallel_time = time_function(evaluate, repeats=1)
+        print(f"    {workers} workers: {parallel_time:.3g}s ({serial_time/parallel_time:.2f}x serial)")
+
+benchmarks = {"lattice_phasor_sum": benchmark_lattice_phasor_sum, "lattice_construction": benchmark_lattice_construction, "lazy_lattice": benchmark_lazy_lattice, "unit_conversion": benchmark_unit_conversion, "import_time": benchmark_import_time, "first_result": benchmark_first_result, "atom_quadrature": benchmark_atom_quadrature, "parallel_render": benchmark_parallel_render}
+
+if __name__ == "__main__":
+    for name in sys.argv[1:] or benchmarks:
+        benchmarks[name]()
@@ -1,9 +1,95 @@
 import numpy as np
-from geometry_utils import slice_points
+from geometry_utils import index_by_dimension, slice_point_blocks
 
 from raw_unit_cells import simple_cubic
+from spatial_index import SpatialIndex
 from unit_cell import UnitCell
 
+def geometric_phase_sum(phases:np.array, num_terms:int) -> np.array:
+    """Returns the sum of exp(i * n * phase) for n from 1 to 'num_terms',
+    for each of 'phases'.
+
+    Notes
+    -----
+    This is the geometric series
+
+    exp(i(N+1)x/2) sin(Nx/2)/sin(x/2)
+
+    where N is 'num_terms'. Where sin(x/2) vanishes, the ratio of sines is
+    replaced by its limit, N cos(Nx/2)/cos(x/2).
+    """
+    phases = np.asarray(phases, dtype=float)
+    half_phases = phases/2
+    denominator = np.sin(half_phases)
+    near_peak = np.abs(denominator) < 1e-9
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(near_peak, num_terms*np.cos(num_terms*half_phases)/np.cos(half_phases), np.sin(num_terms*half_phases)/denominator)
+    return np.exp(1j*(num_terms+1)*half_phases) * ratio
+
+def laue_scattering_amplitude(scattering_vectors:np.array, shape:'tuple[int, int, int]', unit_cell:UnitCell, scattering_factor:complex=1) -> np.array:
+    """Returns the far-field scattering amplitude of a rectangular
+    lattice of identical unit cells, without computing its points.
+
+    The sum of exp(-i q·r) over every point r of the lattice factorizes
+    into the sum over the points of one unit cell, times one geometric
+    series per axis over the cells along that axis (the Laue interference
+    function). The cost for each scattering vector therefore doesn't
+    depend on the number of cells.
+
+    Parameters
+    ----------
+    scattering_vectors : np.array
+        A (..., 3) array of scattering vectors, q, in radians per unit of
+        the lattice's coordinates.
+    shape : tuple of int (x, y, z)
+        The shape of the lattice, in unit cells.
+    unit_cell : UnitCell
+        The unit cell the lattice is composed of.
+    scattering_factor : complex, optional
+        The scattering factor of each point.
+
+    Returns
+    -------
+    np.array of complex
+        The scattering amplitude at each scattering vector. This equals
+        the sum over the points of 'CrystalLattice(shape, unit_cell)',
+        including the points its neighbouring unit cells share.
+    """
+    scattering_vectors = np.asarray(scattering_vectors, dtype=float)
+    cell_amplitude = np.sum(np.exp(-1j * (scattering_vectors @ unit_cell.all_points.T)), axis=-1)
+
+    lattice_amplitude = scattering_factor * cell_amplitude
+    for dim in range(3):
+        lattice_amplitude = lattice_amplitude * geometric_phase_sum(-scattering_vectors[..., dim]*unit_cell.size[dim], shape[dim])
+    return lattice_amplitude
+
+def sum_scattering_amplitude(blocks:'iterable', scattering_vectors:np.array, scattering_factor:complex=1) -> np.array:
+    """Returns the far-field scattering amplitude of a stream of points,
+    the sum of exp(-i q·r) over each point r of every block.
+
+    Parameters
+    ----------
+    blocks : iterable of np.array
+        The (points, 3) blocks of points to sum over, such as those
+        yielded by 'CrystalLattice.iter_blocks'.
+    scattering_vectors : np.array
+        A (..., 3) array of scattering vectors, q, in radians per unit of
+        the points' coordinates.
+    scattering_factor : complex, optional
+        The scattering factor of each point.
+
+    Returns
+    -------
+    np.array of complex
+        The scattering amplitude at each scattering vector.
+    """
+    scattering_vectors = np.asarray(scattering_vectors, dtype=float)
+    amplitude = np.zeros(scattering_vectors.shape[:-1], dtype=complex)
+    for block in blocks:
+        amplitude += np.sum(np.exp(-1j * (scattering_vectors @ block.T)), axis=-1)
+    return scattering_factor * amplitude
+
 class CrystalLattice:
     """ A representation of the points in a crystal lattice.
     
@@ -17,6 +103,14 @@ class CrystalLattice:
         A 3d tensor of each "edge point" in the crystal lattice. The edge
         points will form the bounding box of each unit cell when they 
         are rendered.
+    shape : tuple of int (x, y, z)
+        The shape of the lattice, in unit cells.
+    unit_cell : UnitCell
+        The unit cell the lattice is composed of.
+    rectangular : bool
+        Whether 'all_points' still holds the rectangular lattice it was
+        constructed with. Code which modifies 'all_points' in place should
+        set this to False, see 'is_rectangular'.
     """
 
     def __init__(self, shape:'tuple[int, int, int]', unit_cell:UnitCell) -> None:
@@ -36,19 +130,65 @@ class CrystalLattice:
             The class used to represent a unit cell. 
         """        
 
-        self.all_points = np.zeros((np.prod(shape), unit_cell.num_points, 3))
-        self.edge_points = np.zeros((np.prod(shape), unit_cell.num_edge_points, 3))
+        #The unit cells are ordered by x, then y, then z, each counting from 1
+        cell_indices = np.stack(np.meshgrid(*(np.arange(1, length+1) for length in shape), indexing="ij"), axis=-1).reshape((-1, 3))
+        cell_offsets = cell_indices * np.array(unit_cell.size, dtype=float)
+
+        self.all_points = unit_cell.all_points[np.newaxis, :, :] + cell_offsets[:, np.newaxis, :]
+        self.edge_points = unit_cell.edge_points[np.newaxis, :, :] + cell_offsets[:, np.newaxis, :]
+
+        self.shape = tuple(shape)
+        self.unit_cell = unit_cell
+        self.rectangular = True
+        self.constructed_points = self.all_points
+        self.spatial_index = None
 
-        current_lattice_index = 0
+    def is_rectangular(self) -> bool:
+        """Returns whether the lattice is still the untouched rectangular
+        lattice it was constructed as, so that its scattering can be 
+        computed with 'laue_scattering_amplitude'.
 
-        for x in range(1, shape[0]+1):
-            for y in range(1, shape[1]+1):
-                for z in range(1, shape[2]+1):
-                    adjusted_unit_cell = unit_cell.get_shifted_points(x, y, z)
-                    adjusted_edge_points = unit_cell.get_shifted_points(x, y, z, points="edge")
-                    self.all_points[current_lattice_index] = adjusted_unit_cell
-                    self.edge_points[current_lattice_index] = adjusted_edge_points
-                    current_lattice_index += 1
+        Returns
+        -------
+        bool
+            False if 'rectangular' has been set to False, or 'all_points'
+            has been replaced, since the lattice was constructed.
+        """
+        return self.rectangular and self.all_points is self.constructed_points
+
+    def scattering_amplitude(self, scattering_vectors:np.array, scattering_factor:complex=1, block_size:int=2**14) -> np.array:
+        """Returns the far-field scattering amplitude of the lattice, the
+        sum of exp(-i q·r) over each of its points r.
+
+        If the lattice is untouched, this uses the closed form of 
+        'laue_scattering_amplitude'. Otherwise the sum is computed 
+        directly over the points, 'block_size' points at a time.
+
+        Parameters
+        ----------
+        scattering_vectors : np.array
+            A (..., 3) array of scattering vectors, q, in radians per unit
+            of the lattice's coordinates.
+        scattering_factor : complex, optional
+            The scattering factor of each point.
+        block_size : int, optional
+            The number of points summed over at once when the sum is
+            computed directly.
+
+        Returns
+        -------
+        np.array of complex
+            The scattering amplitude at each scattering vector.
+        """
+        if self.is_rectangular():
+            return laue_scattering_amplitude(scattering_vectors, self.shape, self.unit_cell, scattering_factor)
+
+        return sum_scattering_amplitude(self.iter_blocks(block_size), scattering_vectors, scattering_factor)
+
+    def far_field_intensity(self, scattering_vectors:np.array, scattering_factor:complex=1) -> np.array:
+        """Returns the far-field scattered intensity of the lattice, the 
+        squared magnitude of 'scattering_amplitude'."""
+        return np.abs(self.scattering_amplitude(scattering_vectors, scattering_factor))**2
         
     def get_raw_points(self):
         """Returns the lattice structure as a matrix of points
@@ -60,7 +200,286 @@ class CrystalLattice:
             atoms should be drawn
         """        
         return self.all_points.reshape((self.all_points.shape[1]*self.all_points.shape[0], 3))
-    
-    def get_2d_slice(self, axis:str, slice_ind:int):
+
+    def iter_blocks(self, block_size:int=2**16) -> 'iterator':
+        """Yields the points of 'get_raw_points', 'block_size' points at a
+        time, as views of 'all_points'.
+
+        Parameters
+        ----------
+        block_size : int, optional
+            The largest number of points in each block.
+
+        Yields
+        ------
+        np.array
+            A (points, 3) block of points.
+        """
         raw_points = self.get_raw_points()
-        return slice_points(raw_points, axis, slice_ind)
\ No newline at end of file
+        for start in range(0, len(raw_points), block_size):
+            yield raw_points[start:start+block_size]
+    
+    def get_spatial_index(self) -> SpatialIndex:
+        """Returns a SpatialIndex of the points of 'get_raw_points'. This 
+        is only built once while the lattice is untouched (see 
+        'is_rectangular'), and rebuilt on every call otherwise."""
+        if not self.is_rectangular():
+            return SpatialIndex(self.get_raw_points())
+        if self.spatial_index is None:
+            self.spatial_index = SpatialIndex(self.get_raw_points())
+        return self.spatial_index
+    
+    def get_2d_slice(self, axis:str, slice_ind:int, tolerance:float=0):
+        """Returns the points of the lattice on a plane as 2d points, see
+        'SpatialIndex.get_2d_slice'."""
+        return self.get_spatial_index().get_2d_slice(axis, slice_ind, tolerance)
+
+    def get_sites(self) -> 'LatticeSites':
+        """Returns the distinct sites of the lattice, with the points 
+        shared by neighbouring unit cells only included once. These are
+        the sites of the lattice as it was constructed, see 
+        'LatticeSites'."""
+        return LatticeSites(self.shape, self.unit_cell)
+
+class LazyCrystalLattice:
+    """ A representation of the points in a crystal lattice which only
+    stores its unit cell and shape, and computes its points a block at a
+    time when they are iterated over.
+
+    The points are the same, and in the same order, as those of a 
+    CrystalLattice with the same shape and unit cell, but the memory used
+    depends on the block size rather than the size of the crystal. 
+    
+    Attributes
+    ----------
+    shape : tuple of int (x, y, z)
+        The shape of the lattice, in unit cells.
+    unit_cell : UnitCell
+        The unit cell the lattice is composed of.
+    block_size : int
+        The number of points in each block yielded by 'iter_blocks', 
+        rounded down to a whole number of unit cells.
+    num_cells : int
+        The number of unit cells in the lattice.
+    num_points : int
+        The number of points in the lattice.
+    """
+
+    def __init__(self, shape:'tuple[int, int, int]', unit_cell:UnitCell, block_size:int=2**16) -> None:
+        """A constructor for the LazyCrystalLattice class.
+
+        Parameters
+        ----------
+        shape : tuple of int (x, y, z)
+            The shape that the crystal lattice should take. This is 
+            described in unit cells.
+        unit_cell : UnitCell
+            The unit cell the lattice should be composed of. 
+        block_size : int, optional
+            The default number of points in each block yielded by
+            'iter_blocks'.
+        """
+        self.shape = tuple(shape)
+        self.unit_cell = unit_cell
+        self.block_size = block_size
+        self.num_cells = int(np.prod(self.shape))
+        self.num_points = self.num_cells * unit_cell.num_points
+
+    def iter_cell_offsets(self, block_size:int=None) -> 'iterator':
+        """Yields the offsets of the unit cells, in the order of 
+        CrystalLattice, as (cells, 3) blocks holding 'block_size' points' 
+        worth of cells."""
+        if block_size is None:
+            block_size = self.block_size
+        cells_per_block = max(1, block_size // self.unit_cell.num_points)
+        cell_size = np.array(self.unit_cell.size, dtype=float)
+
+        for start in range(0, self.num_cells, cells_per_block):
+            #The unit cells are ordered by x, then y, then z, each counting from 1
+            cell_indices = np.stack(np.unravel_index(np.arange(start, min(start+cells_per_block, self.num_cells)), self.shape), axis=-1) + 1
+            yield cell_indices * cell_size
+
+    def iter_blocks(self, block_size:int=None) -> 'iterator':
+        """Yields the points of the lattice a block at a time.
+
+        Parameters
+        ----------
+        block_size : int, optional
+            The largest number of points in each block. This defaults to
+            the lattice's 'block_size', and is rounded down to a whole 
+            number of unit cells, with at least one cell in each block.
+
+        Yields
+        ------
+        np.array
+            A (points, 3) block of points. Joining the blocks gives the
+            same array as 'CrystalLattice.get_raw_points'.
+        """
+        unit_cell_points = np.asarray(self.unit_cell.all_points, dtype=float)
+        for cell_offsets in self.iter_cell_offsets(block_size):
+            yield (unit_cell_points[np.newaxis, :, :] + cell_offsets[:, np.newaxis, :]).reshape((-1, 3))
+
+    def iter_edge_blocks(self, block_size:int=None) -> 'iterator':
+        """Yields the edge points of the lattice a block at a time, in the
+        same way as 'iter_blocks'."""
+        unit_cell_edges = np.asarray(self.unit_cell.edge_points, dtype=float)
+        for cell_offsets in self.iter_cell_offsets(block_size):
+            yield (unit_cell_edges[np.newaxis, :, :] + cell_offsets[:, np.newaxis, :]).reshape((-1, 3))
+
+    def is_rectangular(self) -> bool:
+        """Returns True, as the points of a lazy lattice can't be modified."""
+        return True
+
+    def scattering_amplitude(self, scattering_vectors:np.array, scattering_factor:complex=1) -> np.array:
+        """Returns the far-field scattering amplitude of the lattice, with
+        the closed form of 'laue_scattering_amplitude'.
+
+        See Also
+        --------
+        sum_scattering_amplitude :
+            Sums the amplitude directly over the blocks of 'iter_blocks'.
+        """
+        return laue_scattering_amplitude(scattering_vectors, self.shape, self.unit_cell, scattering_factor)
+
+    def far_field_intensity(self, scattering_vectors:np.array, scattering_factor:complex=1) -> np.array:
+        """Returns the far-field scattered intensity of the lattice, the 
+        squared magnitude of 'scattering_amplitude'."""
+        return np.abs(self.scattering_amplitude(scattering_vectors, scattering_factor))**2
+
+    def get_raw_points(self) -> np.array:
+        """Returns every point of the lattice as a single (points, 3) 
+        array. This holds the whole lattice in memory, so 'iter_blocks' 
+        should be preferred for large lattices."""
+        return np.concatenate(list(self.iter_blocks()))
+
+    def get_2d_slice(self, axis:str, slice_ind:int, tolerance:float=0) -> np.array:
+        """Returns the points of the lattice on a plane as 2d points, see
+        'geometry_utils.slice_point_blocks'. Only one block is held in 
+        memory at a time, other than the points on the plane."""
+        return slice_point_blocks(self.iter_blocks(), axis, slice_ind, tolerance)
+
+    def get_sites(self) -> 'LatticeSites':
+        """Returns the distinct sites of the lattice, with the points 
+        shared by neighbouring unit cells only included once. These are
+        the sites of the lattice as it was constructed, see 
+        'LatticeSites'."""
+        return LatticeSites(self.shape, self.unit_cell)
+
+class LatticeSites:
+    """ The distinct sites of a rectangular crystal lattice, stored as 
+    integer unit cell indices and the index of each site's atom in the
+    basis of the unit cell.
+
+    A UnitCell includes the atoms on its corners and faces, which are
+    shared with its neighbouring cells, so the points of a CrystalLattice
+    repeat every shared atom (each corner atom up to 8 times). Here each
+    site is only stored once, and its coordinates are only computed when
+    they are requested, as basis[basis_id] + cell_index * size, in the
+    same way as the points of CrystalLattice. The sites are the distinct
+    points of the CrystalLattice with the same shape and unit cell.
+
+    Attributes
+    ----------
+    shape : tuple of int (x, y, z)
+        The shape of the lattice, in unit cells.
+    unit_cell : UnitCell
+        The unit cell the lattice is composed of.
+    basis : np.array
+        A (atoms, 3) array of the coordinates of each distinct atom of the
+        unit cell, wrapped into the cell. Points of the unit cell which
+        differ by a whole number of cells are the same atom.
+    cell_indices : np.array of np.int32
+        A (sites, 3) array of the index of the unit cell of each site.
+    basis_ids : np.array of np.int16
+        The index into 'basis' of the atom of each site.
+    num_sites : int
+        The number of sites.
+    """
+
+    def __init__(self, shape:'tuple[int, int, int]', unit_cell:UnitCell) -> None:
+        """A constructor for the LatticeSites class.
+
+        Parameters
+        ----------
+        shape : tuple of int (x, y, z)
+            The shape of the lattice, in unit cells.
+        unit_cell : UnitCell
+            The unit cell the lattice is composed of.
+        """
+        self.shape = tuple(shape)
+        self.unit_cell = unit_cell
+
+        cell_points = np.asarray(unit_cell.all_points, dtype=float)
+        cell_size = np.array(unit_cell.size, dtype=float)
+        wrapped_points = np.mod(np.round(cell_points, 9), cell_size)
+        self.basis, point_basis_ids = np.unique(wrapped_points, axis=0, return_inverse=True)
+        point_basis_ids = point_basis_ids.reshape(-1)
+        #Each point of the unit cell is an atom of the basis, shifted by a whole number of cells
+        point_shifts = np.round((cell_points - self.basis[point_basis_ids]) / cell_size).astype(int)
+
+        cell_indices = []
+        basis_ids = []
+        for basis_id in range(len(self.basis)):
+            shifts = point_shifts[point_basis_ids == basis_id]
+            min_shift = np.min(shifts, axis=0)
+            #An atom of the basis occupies its place in every cell it is shifted into from a cell of the lattice
+            occupied = np.zeros(np.array(self.shape) + np.max(shifts, axis=0) - min_shift, dtype=bool)
+            for shift in shifts - min_shift:
+                occupied[tuple(slice(start, start+length) for start, length in zip(shift, self.shape))] = True
+
+            #The unit cells count from 1, as they do in CrystalLattice
+            cell_indices.append((np.argwhere(occupied) + 1 + min_shift).astype(np.int32))
+            basis_ids.append(np.full(len(cell_indices[-1]), basis_id, dtype=np.int16))
+
+        self.cell_indices = np.concatenate(cell_indices)
+        self.basis_ids = np.concatenate(basis_ids)
+        self.num_sites = len(self.basis_ids)
+        self.spatial_index = None
+
+    def get_points(self, start:int=0, stop:int=None) -> np.array:
+        """Returns the coordinates of the sites from 'start' up to 'stop'.
+
+        Parameters
+        ----------
+        start, stop : int, optional
+            The range of sites to return the coordinates of. By default,
+            the coordinates of every site are returned.
+
+        Returns
+        -------
+        np.array
+            A (sites, 3) array of the coordinates of each site.
+        """
+        #The same arithmetic as CrystalLattice, so that the coordinates of sites which aren't shifted are identical to its points
+        return self.basis[self.basis_ids[start:stop]] + self.cell_indices[start:stop] * np.array(self.unit_cell.size, dtype=float)
+
+    def iter_blocks(self, block_size:int=2**16) -> 'iterator':
+        """Yields the coordinates of the sites, 'block_size' sites at a 
+        time, see 'get_points'."""
+        for start in range(0, self.num_sites, block_size):
+            yield self.get_points(start, start+block_size)
+
+    def get_spatial_index(self) -> SpatialIndex:
+        """Returns a SpatialIndex of the coordinates of the sites, which
+        is only built the first time it is requested."""
+        if self.spatial_index is None:
+            self.spatial_index = SpatialIndex(self.get_points())
+        return self.spatial_index
+
+    def get_2d_slice(self, axis:str, slice_ind:int, tolerance:float=0) -> np.array:
+        """Returns the sites on a plane as 2d points, see 
+        'SpatialIndex.get_2d_slice'."""
+        return self.get_spatial_index().get_2d_slice(axis, slice_ind, tolerance)
+
+def check_lattice_sites():
+    for unit_cell in (UnitCell.simple_cubic(1), UnitCell.face_centered_cubic(1), UnitCell.body_centered_cubic(1), UnitCell.simple_cubic(2), UnitCell.face_centered_cubic(0.5)):
+        lattice = CrystalLattice((3, 4, 5), unit_cell)
+        sites = lattice.get_sites()
+        #The sites should be exactly the distinct points of the lattice
+        assert np.allclose(np.unique(sites.get_points(), axis=0), np.unique(lattice.get_raw_points(), axis=0), rtol=0, atol=1e-9)
+        assert sites.num_sites == len(np.unique(lattice.get_raw_points(), axis=0))
+        for axis in ('x', 'y', 'z'):
+            for slice_ind in np.unique(lattice.get_raw_points()[:, index_by_dimension[axis]]):
+                site_slice = np.unique(sites.get_2d_slice(axis, slice_ind), axis=0)
+                assert np.array_equal(site_slice, np.unique(lattice.get_2d_slice(axis, slice_ind), axis=0))
+
@@ -0,0 +1,98 @@
+import math
+
+import numpy as np
+from numba import njit, prange
+
+from thomson_scattering import radius_by_shell
+
+classical_electron_radius = 2.8179403262e-15
+
+@njit(cache=True)
+def atom_scattering_kernel(offset:float, wavenumber:float, electron_distance:float) -> complex:
+    """Returns the field scattered by a single atom at a distance of
+    'offset' nanometers, for an incident field strength of 1 and an
+    observation time of 0.
+
+    This is the scalar, compiled equivalent of
+    'thomson_scattering.analytic_atom_scattering', with the electron
+    shell passed as its radius rather than as a string.
+    """
+    decay = 2/electron_distance - 1j*wavenumber
+    radial_integral = (4/electron_distance**3) * (1/decay**2 + offset/decay)
+    phasor = complex(math.cos(wavenumber*offset), math.sin(wavenumber*offset))
+    return classical_electron_radius * 1e9 * phasor * radial_integral
+
+@njit(parallel=True, cache=True)
+def lattice_phasor_sum(points:np.array, atom_phasors:np.array, observation_points:np.array, wavenumber:float, electron_distance:float) -> np.array:
+    """Returns the field scattered by every atom of 'points', summed at
+    each of 'observation_points'. The points of observation are split
+    over threads.
+
+    Parameters
+    ----------
+    points : np.array
+        A (atoms, dimensions) array of the position of each atom, in
+        nanometers.
+    atom_phasors : np.array
+        A complex array with one value per atom, which each atom's
+        scattered field is multiplied by.
+    observation_points : np.array
+        A (points, dimensions) array of the points of observation, in
+        nanometers.
+    wavenumber : float
+        The wavenumber of the incident light, in radians/nanometer.
+    electron_distance : float
+        The radius of the scattering electron's shell, in nanometers.
+
+    Returns
+    -------
+    np.array of complex
+        The scattered field at each point of observation.
+    """
+    field = np.zeros(observation_points.shape[0], dtype=np.complex128)
+    for point_ind in prange(observation_points.shape[0]):
+        value_at_observation_point = 0j
+        for atom_ind in range(points.shape[0]):
+            #The distance is accumulated the same way as np.hypot.reduce, so it matches the numpy path
+            atomic_distance = 0.0
+            for dim in range(points.shape[1]):
+                atomic_distance = math.hypot(atomic_distance, observation_points[point_ind, dim] - points[atom_ind, dim])
+            value_at_observation_point += atom_phasors[atom_ind] * atom_scattering_kernel(atomic_distance, wavenumber, electron_distance)
+        field[point_ind] = value_at_observation_point
+    return field
+
+def calculate_diffraction_field(points:np.array, atom_phasors:np.array, observation_points:np.array, wavelength:float, electron_shell:str='k') -> np.array:
+    """Returns the complex field scattered by a group of atoms at every
+    passed point of observation, using the compiled 'lattice_phasor_sum'.
+
+    Parameters
+    ----------
+    points : np.array
+        A (atoms, dimensions) array of the position of each atom.
+    atom_phasors : np.array
+        A complex array with one value per atom, which each atom's
+        scattered field is multiplied by.
+    observation_points : np.array
+        A (..., dimensions) array of the points of observation.
+    wavelength : float
+        The wavelength of the incident light, in nanometers.
+    electron_shell : {"k", "l"}, optional
+        The electron shell of the scattering electrons.
+
+    Returns
+    -------
+    np.array of complex
+        The scattered field, with the shape of 'observation_points'
+        without its last dimension.
+
+    See Also
+    --------
+    diffraction_plot.calculate_diffraction_field :
+        The numpy equivalent of this function, using the "analytic" form
+        factor.
+    """
+    observation_points = np.asarray(observation_points, dtype=float)
+    flat_observations = np.ascontiguousarray(observation_points.reshape((-1, observation_points.shape[-1])))
+
+    field = lattice_phasor_sum(np.ascontiguousarray(points, dtype=float), np.ascontiguousarray(atom_phasors, dtype=complex), flat_observations, 2*np.pi/wavelength, radius_by_shell[electron_shell])
+    return field.reshape(observation_points.shape[:-1])
@@ -0,0 +1,103 @@
+import numpy as np
+
+from diffraction_plot import DiffractionPlot, form_factors
+
+class DiffractionPlan:
+    """ A precomputed description of a DiffractionPlot's lattice and grid
+    of points of observation, which evaluates the scattered field for many
+    angles and wavelengths.
+
+    The distances between every atom and every point of observation don't
+    depend on the angle or the wavelength, so they are computed once when
+    the plan is made. The scattering of each atom at those distances only
+    depends on the wavelength, so it is computed once per wavelength and
+    kept for later batches. Each (angle, wavelength) pair is then only a
+    phase update of the atoms and a sum over them.
+
+    Attributes
+    ----------
+    plot : DiffractionPlot
+        The plot whose lattice and form factor are used.
+    distances : np.array
+        A (atoms, rows, columns) array of the distance between each atom
+        and each point of observation.
+    atom_scattering : dict of np.array
+        The scattering of each atom at each point of observation, by
+        wavelength.
+    """
+
+    def __init__(self, plot:DiffractionPlot, min:float, max:float, step:float, x_shift:float, y_shift:float) -> None:
+        """A constructor for the DiffractionPlan class.
+
+        Parameters
+        ----------
+        plot : DiffractionPlot
+            The plot whose lattice and form factor should be used.
+        min, max, step, x_shift, y_shift : float
+            The description of the grid, see
+            'DiffractionPlot.get_observation_grid'.
+        """
+        self.plot = plot
+
+        xx, yy = plot.get_observation_grid(min, max, step, x_shift, y_shift)
+        observation_points = np.stack((xx, yy), axis=-1)
+        self.distances = np.hypot.reduce(observation_points[np.newaxis] - plot.points[:, np.newaxis, np.newaxis, :], axis=-1)
+        self.atom_scattering = {}
+
+    def get_atom_scattering(self, wavelength:float) -> np.array:
+        """Returns the scattering of each atom at each point of observation
+        for 'wavelength', computing it if this is the first time it is
+        requested.
+
+        Parameters
+        ----------
+        wavelength : float
+            The wavelength of the incident light, in nanometers.
+
+        Returns
+        -------
+        np.array of complex
+            A (atoms, rows, columns) array of the field scattered by each
+            atom.
+        """
+        if wavelength not in self.atom_scattering:
+            self.atom_scattering[wavelength] = form_factors[self.plot.form_factor](self.distances, wavelength)
+        return self.atom_scattering[wavelength]
+
+    def execute(self, angles:np.array, wavelengths:np.array, returned_value:str="amplitude") -> np.array:
+        """Returns the scattered field over the plan's grid for each pair of
+        'angles' and 'wavelengths'.
+
+        Parameters
+        ----------
+        angles : np.array
+            The angle of the incident light for each evaluation, in
+            radians.
+        wavelengths : np.array
+            The wavelength of the incident light for each evaluation, in
+            nanometers. This is broadcast against 'angles'.
+        returned_value : [{"complex", "amplitude", "phase"}, optional]
+            The part of the scattered field to be returned.
+
+        Returns
+        -------
+        np.array
+            A (evaluations, rows, columns) array of the requested part of
+            the scattered field. Each image is indexed the same way as the
+            one returned by 'DiffractionPlot.calculate_meshgrid'.
+        """
+        angles, wavelengths = np.broadcast_arrays(np.atleast_1d(angles), np.atleast_1d(wavelengths))
+
+        field = np.zeros((len(angles),) + self.distances.shape[1:], dtype=complex)
+        for i, (angle, wavelength) in enumerate(zip(angles, wavelengths)):
+            atom_phasors = self.plot.get_atom_phasors(angle, wavelength)
+            field[i] = np.tensordot(atom_phasors, self.get_atom_scattering(wavelength), axes=1)
+
+        if returned_value == "complex":
+            return field
+        elif returned_value == "amplitude":
+            return np.abs(field)
+        elif returned_value == "phase":
+            return np.angle(field)
+        else:
+            raise ValueError("returned_value must be either complex, amplitude, or phase")
@@ -8,21 +8,153 @@ from unit_cell import UnitCell
 
 import matplotlib.pyplot as plt
 
-from thomson_scattering import angle_free_atom_scattering, scattering_by_angle
+from thomson_scattering import analytic_atom_scattering, angle_free_atom_scattering, scattering_by_angle
+from form_factor_table import get_form_factor_table
+from tiled_render import render_tiles
+from render_cache import get_cache_key
+import diffraction_kernels
+import far_field
+from adaptive_sampling import adaptive_meshgrid
 import wave_conversions as wc
 
 import cmath
+import logging
+import warnings
 
 from tqdm import tqdm
 
+logger = logging.getLogger(__name__)
+
 def get_2d_lattice_points(lattice:CrystalLattice, axis:str, slice_ind:int):
+    if lattice.is_rectangular():
+        #The sites of the lattice are already distinct, so they only need to be sorted in the order np.unique would return them in
+        points = lattice.get_sites().get_2d_slice(axis, slice_ind)
+        return points[np.lexsort(points.T[::-1])]
+
     raw_points = lattice.get_2d_slice(axis, slice_ind)
 
     return np.unique(raw_points, axis=0)
 
+def numerical_form_factor(distances:np.array, wavelength:float) -> np.array:
+    """Returns the scattering of a single atom at each of 'distances',
+    computed by numerically integrating over its electron cloud.
+
+    Parameters
+    ----------
+    distances : np.array
+        The distances between the atom and the points of observation.
+        These should be described in nanometers.
+    wavelength : float
+        The wavelength of the incident light, in nanometers.
+
+    Returns
+    -------
+    np.array of complex
+        The complex scattered field at each distance, with the same shape
+        as 'distances'.
+    """
+    atom_scattering = np.vectorize(angle_free_atom_scattering, otypes=[complex])
+    return atom_scattering(1, wavelength, 0, 'k', distances)
+
+def table_form_factor(distances:np.array, wavelength:float) -> np.array:
+    """Returns the scattering of a single atom at each of 'distances',
+    interpolated from a precomputed form factor table. The table covers
+    the largest of the distances rounded up to a power of two, so that 
+    point sets of a similar extent share a table.
+
+    See Also
+    --------
+    numerical_form_factor : 
+        A description of the parameters.
+    form_factor_table.FormFactorTable : 
+        The table the scattering is interpolated from.
+    """
+    #The range is bucketed by 'form_factor_table.get_table_range', which keys the cached tables
+    table = get_form_factor_table(wavelength, 'k', np.max(distances))
+    return table(distances)
+
+def analytic_form_factor(distances:np.array, wavelength:float) -> np.array:
+    """Returns the scattering of a single atom at each of 'distances',
+    computed with the closed form of the integral over its electron cloud.
+
+    See Also
+    --------
+    numerical_form_factor : 
+        A description of the parameters.
+    thomson_scattering.analytic_atom_scattering : 
+        The closed form solution this function wraps.
+    """
+    return analytic_atom_scattering(1, wavelength, 0, 'k', distances)
+
+form_factors = {"numerical": numerical_form_factor, "table": table_form_factor, "analytic": analytic_form_factor}
+""" A dictionary of the functions which can be used to compute the
+scattering of a single atom over an array of distances """
+
+def calculate_diffraction_field(points:np.array, atom_phasors:np.array, observation_points:np.array, wavelength:float, form_factor:str="numerical", returned_value:str="complex", chunk_size:int=2**16) -> np.array:
+    """Returns the field scattered by a group of atoms at every passed
+    point of observation.
+
+    The distances between every atom and every point of observation are
+    computed as a single (atoms x points) array, so that the scattering
+    of each atom and the sum over atoms are done with numpy rather than
+    one point at a time.
+
+    Parameters
+    ----------
+    points : np.array
+        A (atoms, dimensions) array of the position of each atom.
+    atom_phasors : np.array
+        A complex array with one value per atom, which each atom's
+        scattered field is multiplied by. This is how phase shifts
+        between atoms are applied.
+    observation_points : np.array
+        A (..., dimensions) array of the points at which to observe the
+        scattered field.
+    wavelength : float
+        The wavelength of the incident light, in the same units as the
+        points.
+    form_factor : str, optional
+        The key in 'form_factors' of the function used to compute the
+        scattering of a single atom.
+    returned_value : [{"complex", "amplitude", "phase"}, optional]
+        The part of the scattered field to be returned.
+    chunk_size : int, optional
+        The number of points of observation to evaluate at once. This
+        bounds the size of the (atoms x points) arrays held in memory.
+
+    Returns
+    -------
+    np.array
+        The requested part of the scattered field, with the shape of
+        'observation_points' without its last dimension.
+    """
+    points = np.asarray(points, dtype=float)
+    atom_phasors = np.asarray(atom_phasors, dtype=complex)
+    observation_points = np.asarray(observation_points, dtype=float)
+
+    grid_shape = observation_points.shape[:-1]
+    flat_observations = observation_points.reshape((-1, observation_points.shape[-1]))
+    field = np.zeros(len(flat_observations), dtype=complex)
+
+    atom_scattering = form_factors[form_factor]
+    for start in range(0, len(flat_observations), chunk_size):
+        chunk = flat_observations[start:start+chunk_size]
+        distances = np.hypot.reduce(chunk[np.newaxis, :, :] - points[:, np.newaxis, :], axis=2)
+        field[start:start+chunk_size] = atom_phasors @ atom_scattering(distances, wavelength)
+
+    field = field.reshape(grid_shape)
+    if returned_value == "complex":
+        return field
+    elif returned_value == "amplitude":
+        return np.abs(field)
+    elif returned_value == "phase":
+        return np.angle(field)
+    else:
+        raise ValueError("returned_value must be either complex, amplitude, or phase")
+
 class DiffractionPlot:
     
-    def __init__(self, interatomic_spacing) -> None:
+    def __init__(self, interatomic_spacing, form_factor="analytic") -> None:
         self.points = get_2d_lattice_points(CrystalLattice((4, 1, 1), UnitCell.simple_cubic(1)), 'y', 1)
         self.points[:,0] -= 3
         self.points *= interatomic_spacing
@@ -30,12 +162,126 @@ class DiffractionPlot:
         print(self.points)
 
         self.interatomic_spacing = interatomic_spacing
+        self.form_factor = form_factor
+        self.phase_shifted_atoms = self.points[:,1] == interatomic_spacing
     
     def plot_points(self):
         plt.scatter(self.points[:,0], self.points[:,1])
         plt.show()
 
+    def get_phase_shift(self, angle_of_scattering:float, wavelength:float) -> float:
+        """Returns the phase shift applied to the scattering of the atoms
+        in the first row of the lattice.
+
+        Parameters
+        ----------
+        angle_of_scattering : float
+            The angle of the incident light, in radians.
+        wavelength : float
+            The wavelength of the incident light, in nanometers.
+
+        Returns
+        -------
+        float
+            The phase shift, in radians.
+        """
+        wavenumber = 2*np.pi/wavelength
+        return wavenumber * np.sin(angle_of_scattering) * self.interatomic_spacing
+
+    def get_atom_phasors(self, angle_of_scattering:float, wavelength:float) -> np.array:
+        """Returns the complex factor each atom's scattering is multiplied
+        by, such that the phase shift of 'get_phase_shift' is applied to 
+        the atoms in the first row of the lattice.
+
+        Parameters
+        ----------
+        angle_of_scattering : float
+            The angle of the incident light, in radians.
+        wavelength : float
+            The wavelength of the incident light, in nanometers.
+
+        Returns
+        -------
+        np.array of complex
+            One phasor for each of the plot's points.
+        """
+        phase_shift = self.get_phase_shift(angle_of_scattering, wavelength)
+        return np.where(self.phase_shifted_atoms, np.exp(1j * phase_shift), 1+0j)
+
+    def get_observation_axes(self, min:float, max:float, step:float, x_shift:float, y_shift:float) -> 'tuple[np.array, np.array]':
+        """Returns the x and y coordinates of the columns and rows of the
+        grid returned by 'get_observation_grid'.
+
+        Returns
+        -------
+        tuple of np.array (x_points, y_points)
+            The x coordinate of each column, and the y coordinate of each
+            row of the grid.
+        """
+        x_points = np.arange(min, max, step) + x_shift
+        y_points = np.arange(min, max, step) + y_shift
+
+        return x_points, y_points
+
+    def get_observation_grid(self, min:float, max:float, step:float, x_shift:float, y_shift:float) -> 'tuple[np.array, np.array]':
+        """Returns the x and y coordinates of a square grid of points of
+        observation.
+
+        Parameters
+        ----------
+        min, max : float
+            The range of the grid on both axes, before it is shifted.
+        step : float
+            The distance between neighbouring points of the grid.
+        x_shift, y_shift : float
+            The distance to shift the grid by on each axis.
+
+        Returns
+        -------
+        tuple of np.array (xx, yy)
+            The x and y coordinates of each point of the grid, as returned
+            by np.meshgrid.
+        """
+        return np.meshgrid(*self.get_observation_axes(min, max, step, x_shift, y_shift))
+
+    def calculate_diffraction_field(self, observation_x:np.array, observation_y:np.array, angle_of_scattering:float, wavelength:float, returned_value:str="complex") -> np.array:
+        """Returns the field scattered by the lattice at every passed point
+        of observation. This is the vectorized equivalent of 
+        'calculate_diffraction'.
+
+        Parameters
+        ----------
+        observation_x, observation_y : np.array
+            The coordinates of the points of observation, in nanometers.
+        angle_of_scattering : float
+            The angle of the incident light, in radians.
+        wavelength : float
+            The wavelength of the incident light, in nanometers.
+        returned_value : [{"complex", "amplitude", "phase"}, optional]
+            The part of the scattered field to be returned.
+
+        Returns
+        -------
+        np.array
+            The requested part of the scattered field at each point of
+            observation.
+
+        See Also
+        --------
+        calculate_diffraction_field : 
+            The module level function this method wraps.
+        """
+        observation_points = np.stack(np.broadcast_arrays(observation_x, observation_y), axis=-1)
+        atom_phasors = self.get_atom_phasors(angle_of_scattering, wavelength)
+        return calculate_diffraction_field(self.points, atom_phasors, observation_points, wavelength, form_factor=self.form_factor, returned_value=returned_value)
+
     def calculate_diffraction(self, point_of_observation:tuple, angle_of_scattering:float, wavelength:float):
+        """Returns the complex field scattered by the lattice at a single
+        point of observation.
+
+        This is the original, one atom at a time, implementation of
+        'calculate_diffraction_field', and is kept as a reference for it.
+        """
         # wavenumber = wc.convert(1, "wavelength", "wavenumber")
         wavenumber = 2*np.pi/wavelength
         phase_shift = (wavenumber * np.sin(angle_of_scattering) * self.interatomic_spacing) 
@@ -57,13 +303,80 @@ class DiffractionPlot:
             phases.append(polar_scattering_val[1])
         return value_at_observation_point
 
-    def get_meshgrid(self, angle, wavelength, min, max, step, x_shift, y_shift):
-        x_points = np.arange(min, max, step)
-        y_points = np.arange(min, max, step)
-        xx, yy = np.meshgrid(x_points, y_points)
-        
-        xx += x_shift
-        yy += y_shift
+    def calculate_meshgrid(self, angle, wavelength, min, max, step, x_shift, y_shift, method="vectorized", workers=None, evaluator=None):
+        """Returns the amplitude of the scattered field over a square grid
+        of points of observation.
+
+        Parameters
+        ----------
+        angle : float
+            The angle of the incident light, in radians.
+        wavelength : float
+            The wavelength of the incident light, in nanometers.
+        min, max, step, x_shift, y_shift : float
+            The description of the grid, see 'get_observation_grid'.
+        method : [{"vectorized", "numba", "far_field", "adaptive", "scalar"}, optional]
+            Whether to evaluate the whole grid at once with numpy, with 
+            the compiled kernel of 'diffraction_kernels', with the FFT
+            based far-field approximation of 'far_field', only where the
+            amplitude varies with 'adaptive_sampling', or one point at a
+            time with 'calculate_diffraction'. The numba method only 
+            supports the analytic form factor. The far_field method 
+            always uses the analytic form factor, with the falloff of the
+            k shell's electron cloud away from the incident direction,
+            taken to be at 'angle' to the x axis.
+        workers : int, optional
+            If this is passed, the grid is split by rows over this many
+            worker processes. This is only used by the vectorized method.
+        evaluator : parallel_render.ParallelFieldEvaluator, optional
+            A pool of worker processes made for the points of this plot,
+            which is used instead of starting a new pool of 'workers',
+            so that a sweep of grids only starts its processes once. 
+            This is only used by the vectorized method.
+
+        Returns
+        -------
+        np.array
+            The amplitude at each point of the grid, indexed as [y][x].
+        """
+        if method == "vectorized" and (workers is not None or evaluator is not None):
+            if evaluator is None:
+                from parallel_render import ParallelFieldEvaluator
+                with ParallelFieldEvaluator(self.points, workers) as evaluator:
+                    return self.calculate_meshgrid(angle, wavelength, min, max, step, x_shift, y_shift, method, evaluator=evaluator)
+            self.check_evaluator(evaluator)
+
+            x_points, y_points = self.get_observation_axes(min, max, step, x_shift, y_shift)
+            return evaluator.calculate_diffraction_field(self.get_atom_phasors(angle, wavelength), x_points, y_points, wavelength, form_factor=self.form_factor, returned_value="amplitude")
+
+        xx, yy = self.get_observation_grid(min, max, step, x_shift, y_shift)
+
+        if method == "vectorized":
+            return self.calculate_diffraction_field(xx, yy, angle, wavelength, returned_value="amplitude")
+        elif method == "numba":
+            if self.form_factor != "analytic":
+                raise ValueError("The numba method only supports the analytic form factor")
+            field = diffraction_kernels.calculate_diffraction_field(self.points, self.get_atom_phasors(angle, wavelength), np.stack((xx, yy), axis=-1), wavelength)
+            return np.abs(field)
+        elif method == "far_field":
+            fresnel_number = np.max(far_field.get_fresnel_number(self.points, wavelength, np.hypot(xx, yy)))
+            if fresnel_number > 0.1:
+                warnings.warn(f"The far-field approximation does not hold over the whole grid, as its largest Fresnel number, {fresnel_number:.3g}, is not much less than 1")
+
+            #Every atom lies on a multiple of the interatomic spacing, so the voxels need to evenly divide it
+            voxel_size = self.interatomic_spacing / np.ceil(4 * self.interatomic_spacing / wavelength)
+            #The grid is centred on the forward direction of the incident light
+            incident_direction = (np.cos(angle), np.sin(angle))
+            field = far_field.far_field_pattern(self.points, self.get_atom_phasors(angle, wavelength), np.stack((xx, yy), axis=-1), wavelength, incident_direction, voxel_size=voxel_size)
+            return np.abs(field)
+        elif method == "adaptive":
+            x_points, y_points = self.get_observation_axes(min, max, step, x_shift, y_shift)
+            evaluate = lambda observation_x, observation_y: self.calculate_diffraction_field(observation_x, observation_y, angle, wavelength)
+            phase_points, num_evaluations = adaptive_meshgrid(evaluate, x_points, y_points)
+            logger.info("Evaluated %d of %d points (%.1f%%)", num_evaluations, phase_points.size, 100*num_evaluations/phase_points.size)
+            return phase_points
+        elif method != "scalar":
+            raise ValueError("method must be either vectorized, numba, far_field, adaptive, or scalar")
 
         # phase_points = np.zeros((xx.shape[0], xx.shape[1], 10))
         phase_points = np.zeros(xx.shape)
@@ -72,10 +385,94 @@ class DiffractionPlot:
             for x_i, col in enumerate(phase_points):
                 phase_points[y_i][x_i] = cmath.polar(self.calculate_diffraction((xx[y_i][x_i], yy[y_i][x_i]), angle, wavelength))[0]
                 # phase_points[y_i][x_i] = np.array(self.calculate_diffraction((xx[y_i][x_i], yy[y_i][x_i]), angle))
+        return phase_points
+
+    def render_meshgrid(self, path, angle, wavelength, min, max, step, x_shift, y_shift, memory_budget=2**28, workers=None, evaluator=None):
+        """Renders the amplitude of the scattered field over a square grid
+        of points of observation into a memory-mapped .npy file.
+
+        The grid is rendered in square tiles sized to 'memory_budget', so
+        that grids much larger than the available memory can be rendered.
+        If rendering is interrupted, calling this method again with the
+        same arguments resumes from the last completed tile. Calling it
+        with different arguments, or for a different lattice, renders the
+        image again from the start.
+
+        Parameters
+        ----------
+        path : str
+            The path of the .npy file to render into.
+        angle, wavelength, min, max, step, x_shift, y_shift : float
+            The description of the grid, see 'calculate_meshgrid'.
+        memory_budget : int, optional
+            The number of bytes a single tile may use while it is 
+            evaluated.
+        workers : int, optional
+            If this is passed, each tile is split by rows over this many
+            worker processes.
+        evaluator : parallel_render.ParallelFieldEvaluator, optional
+            A pool of worker processes made for the points of this plot,
+            which is used instead of starting a new pool of 'workers'.
+
+        Returns
+        -------
+        np.memmap
+            The same image 'calculate_meshgrid' returns, memory-mapped
+            from 'path'.
+
+        See Also
+        --------
+        tiled_render.render_tiles : 
+            The function which renders and records each tile.
+        """
+        x_points, y_points = self.get_observation_axes(min, max, step, x_shift, y_shift)
+        grid_shape = (len(y_points), len(x_points))
+        render_key = get_cache_key("render_meshgrid", self.points, angle=angle, wavelength=wavelength, min=min, max=max, step=step, x_shift=x_shift, y_shift=y_shift, form_factor=self.form_factor)
+
+        #The (atoms x points) distance, coordinate and field arrays dominate the memory used
+        bytes_per_point = 128 * len(self.points)
+
+        if workers is not None or evaluator is not None:
+            if evaluator is None:
+                from parallel_render import ParallelFieldEvaluator
+                with ParallelFieldEvaluator(self.points, workers) as evaluator:
+                    return self.render_meshgrid(path, angle, wavelength, min, max, step, x_shift, y_shift, memory_budget, evaluator=evaluator)
+            self.check_evaluator(evaluator)
+
+            atom_phasors = self.get_atom_phasors(angle, wavelength)
+            evaluate_tile = lambda rows, cols: evaluator.calculate_diffraction_field(atom_phasors, x_points[cols], y_points[rows], wavelength, form_factor=self.form_factor, returned_value="amplitude")
+            #Each worker only evaluates a part of the tile at once
+            return render_tiles(path, evaluate_tile, grid_shape, memory_budget*evaluator.workers, bytes_per_point, render_key=render_key)
+
+        def evaluate_tile(rows, cols):
+            xx, yy = np.meshgrid(x_points[cols], y_points[rows])
+            return self.calculate_diffraction_field(xx, yy, angle, wavelength, returned_value="amplitude")
+
+        return render_tiles(path, evaluate_tile, grid_shape, memory_budget, bytes_per_point, render_key=render_key)
+
+    def check_evaluator(self, evaluator:'ParallelFieldEvaluator') -> None:
+        """Raises a ValueError if 'evaluator' was made for points other
+        than those of this plot."""
+        if not np.array_equal(evaluator.points, self.points):
+            raise ValueError("evaluator must be made for the points of this plot")
+
+    def get_meshgrid(self, angle, wavelength, min, max, step, x_shift, y_shift, method="vectorized", workers=None, evaluator=None):
+        phase_points = self.calculate_meshgrid(angle, wavelength, min, max, step, x_shift, y_shift, method=method, workers=workers, evaluator=evaluator)
         """ for i in range(10):
             plt.imshow(phase_points[:,:,i])
             plt.colorbar()
             plt.show() """
+        self.plot_meshgrid(phase_points)
+
+    def plot_meshgrid(self, phase_points):
+        """Plots an amplitude image, such as the one returned by 
+        'calculate_meshgrid', in the current matplotlib figure.
+
+        Parameters
+        ----------
+        phase_points : np.array
+            The amplitude at each point of the grid, indexed as [y][x].
+        """
         plt.imshow(phase_points.transpose(), origin='lower')
         col_bar = plt.colorbar()
         col_bar.ax.set_ylabel("Amplitude (Volts / Meter)")
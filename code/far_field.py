@@ -0,0 +1,166 @@
+import numpy as np
+from scipy import ndimage
+
+from thomson_scattering import analytic_atom_scattering, radius_by_shell
+
+def get_fresnel_number(points:np.array, wavelength:float, distance:float) -> float:
+    """Returns the Fresnel number of a group of points observed from
+    'distance'. The far-field approximation holds when this is much less
+    than 1.
+
+    Parameters
+    ----------
+    points : np.array
+        A (points, dimensions) array of the scattering points.
+    wavelength : float
+        The wavelength of the incident light, in the same units as the
+        points.
+    distance : float or np.array
+        The distance between the points and the point of observation.
+
+    Returns
+    -------
+    float or np.array
+        The Fresnel number, a²/(wavelength * distance), where a is half of
+        the largest extent of the points.
+    """
+    aperture_radius = np.max(np.ptp(points, axis=0)) / 2
+    return aperture_radius**2 / (wavelength * np.asarray(distance))
+
+def electron_cloud_transform(wavevector_magnitude:np.array, electron_shell:str) -> np.array:
+    """Returns the Fourier transform of 'thomson_scattering.electron_probability'
+    at the passed magnitudes of the scattering vector.
+
+    Notes
+    -----
+    For the density exp(-2r/a)/(πa³), the transform is 16/(4 + q²a²)²,
+    which is 1 at q = 0 as the density integrates to 1.
+    """
+    electron_distance = radius_by_shell[electron_shell]
+    return 16 / (4 + (wavevector_magnitude*electron_distance)**2)**2
+
+def get_fft_wavevectors(grid_shape:tuple, voxel_size:float) -> 'list[np.array]':
+    """Returns the scattering vector component of each FFT bin along each
+    axis of a grid with 'grid_shape' voxels of 'voxel_size'."""
+    return [2*np.pi*np.fft.fftfreq(num_voxels, voxel_size) for num_voxels in grid_shape]
+
+def voxelize_points(points:np.array, weights:np.array, voxel_size:float, oversampling:int=4) -> 'tuple[np.array, np.array]':
+    """Returns a grid of the weighted density of 'points', padded for use
+    with the FFT.
+
+    The centroid of the points is placed at index 0 of the grid, with the
+    points around it wrapping around the edges of the grid, so that the
+    FFT of the grid is the transform of the density about its centroid.
+
+    Parameters
+    ----------
+    points : np.array
+        A (points, dimensions) array of the scattering points.
+    weights : np.array
+        A complex weight for each of the points.
+    voxel_size : float
+        The side length of each voxel. Each point is moved onto its
+        nearest voxel, so this should evenly divide the spacing between
+        the points.
+    oversampling : int, optional
+        The ratio of the side length of the grid to the extent of the
+        points. Larger values sample the transform more finely.
+
+    Returns
+    -------
+    tuple of np.array (grid, centroid)
+        The complex density grid, and the position of its index 0.
+    """
+    points = np.asarray(points, dtype=float)
+    min_point = np.min(points, axis=0)
+    #The centroid is rounded onto the grid, so that points on multiples of the voxel size land exactly on a voxel
+    centroid = min_point + np.rint((np.max(points, axis=0) - min_point) / (2*voxel_size)) * voxel_size
+    voxel_indices = np.rint((points - centroid) / voxel_size).astype(int)
+
+    extent = np.max(np.abs(voxel_indices), axis=0)*2 + 1
+    grid_shape = tuple(int(2**np.ceil(np.log2(side*oversampling))) for side in extent)
+
+    grid = np.zeros(grid_shape, dtype=complex)
+    np.add.at(grid, tuple((voxel_indices % grid_shape).T), weights)
+    return grid, centroid
+
+def far_field_pattern(points:np.array, weights:np.array, observation_points:np.array, wavelength:float, incident_direction:np.array, electron_shell:str='k', voxel_size:float=None, oversampling:int=4, incident_field_strength:float=1) -> np.array:
+    """Returns the far-field (Fraunhofer) scattered field of a group of
+    atoms at each point of observation.
+
+    In the far field, the scattered field only depends on the direction
+    of the point of observation, through the Fourier transform of the
+    electron density at the scattering vector k * direction. The density
+    is voxelized once and transformed with the FFT, and the transform is
+    then interpolated at the scattering vector of each point of
+    observation.
+
+    Each atom scatters as in 'analytic_atom_scattering', evaluated at the
+    distance of each point of observation, which is the field the atom
+    scatters forwards. The density is convolved with the
+    'electron_probability' profile of 'electron_shell' by multiplying the
+    field with 'electron_cloud_transform' at the momentum transfer
+    k * (direction - incident_direction) of each point of observation,
+    which is 1 in the forward direction.
+
+    Parameters
+    ----------
+    points : np.array
+        A (atoms, dimensions) array of the position of each atom, in
+        nanometers.
+    weights : np.array
+        A complex weight for each atom, such as its phase shift.
+    observation_points : np.array
+        A (..., dimensions) array of the points of observation, in
+        nanometers.
+    wavelength : float
+        The wavelength of the incident light, in nanometers.
+    incident_direction : np.array
+        A vector, with the same dimensions as the points, in the
+        direction of the incident light. This doesn't need to be
+        normalized.
+    electron_shell : {"k", "l"}, optional
+        The electron shell of the scattering electrons.
+    voxel_size : float, optional
+        The side length of each voxel, in nanometers. This defaults to a
+        quarter of the wavelength, which samples scattering vectors up to
+        twice the wavenumber. See 'voxelize_points'.
+    oversampling : int, optional
+        See 'voxelize_points'.
+    incident_field_strength : float, optional
+        The amplitude of the incident light's electric field, in
+        volts/meter.
+
+    Returns
+    -------
+    np.array of complex
+        The scattered field, with the shape of 'observation_points'
+        without its last dimension.
+
+    See Also
+    --------
+    get_fresnel_number :
+        Whether the far-field approximation holds for a distance.
+    """
+    if voxel_size is None:
+        voxel_size = wavelength/4
+    wavenumber = 2*np.pi/wavelength
+
+    grid, centroid = voxelize_points(points, weights, voxel_size, oversampling)
+    structure_factor = np.fft.fftn(grid)
+
+    observation_points = np.asarray(observation_points, dtype=float)
+    relative_points = observation_points - centroid
+    distances = np.linalg.norm(relative_points, axis=-1)
+    wavevectors = wavenumber * relative_points / distances[..., np.newaxis]
+
+    #The FFT samples the scattering vector at multiples of 2π/(grid side length)
+    bin_coordinates = [wavevectors[..., dim] * grid.shape[dim] * voxel_size / (2*np.pi) for dim in range(grid.ndim)]
+    real_part = ndimage.map_coordinates(structure_factor.real, bin_coordinates, order=3, mode="grid-wrap")
+    imaginary_part = ndimage.map_coordinates(structure_factor.imag, bin_coordinates, order=3, mode="grid-wrap")
+    transform = real_part + 1j*imaginary_part
+
+    incident_direction = np.asarray(incident_direction, dtype=float)
+    momentum_transfers = np.linalg.norm(wavevectors - wavenumber*incident_direction/np.linalg.norm(incident_direction), axis=-1)
+    atom_scattering = analytic_atom_scattering(incident_field_strength, wavelength, 0, electron_shell, distances)
+    return atom_scattering * electron_cloud_transform(momentum_transfers, electron_shell) * transform
@@ -1,4 +1,3 @@
-from math import dist
 from matplotlib.pyplot import plot
 import numpy as np
 from geometry_utils import get_3d_cos_wave_between_points
@@ -10,7 +9,6 @@ from traits.api import HasTraits, Range, Instance, on_trait_change, Enum
 from traitsui.api import View, Item, Group
 from mayavi.core.ui.api import MayaviScene, SceneEditor, MlabSceneModel
 
-import array_utils as au
 
 class FieldModel(HasTraits):
     time = Range(0, 100, 0.2)
@@ -42,15 +40,12 @@ class FieldModel(HasTraits):
 
         cloud = np.zeros(self.plot_size)
 
-
         radius = self.plot_size[0] / 2
-        for x in range(self.plot_size[0]):
-            for y in range(self.plot_size[1]):
-                for z in range(self.plot_size[2]):
-                    if not np.array_equal(au.multiply_by_scalar((x, y, z), self.unit_size), atom_point) and dist((x, y, z), atom_point) <= radius:
-                        scaled_point = au.multiply_by_scalar((x, y, z), self.unit_size)
-                        assert dist(scaled_point, atom_point) != 0
-                        cloud[x, y, z] = ts.scattering_by_space(atom_point, au.multiply_by_scalar((x, y, z), self.unit_size), self.wavevector_origin*self.unit_size, self.time, self.wave_amplitude, returned_value=self.mode_select)
+        grid_points = np.stack(np.meshgrid(*(np.arange(length) for length in self.plot_size), indexing="ij"), axis=-1)
+        scaled_points = grid_points * self.unit_size
+        in_field = np.any(scaled_points != atom_point, axis=-1) & (np.hypot.reduce(grid_points - np.array(atom_point), axis=-1) <= radius)
+
+        cloud[in_field] = ts.scattering_by_points(atom_point, scaled_points[in_field], self.wavevector_origin*self.unit_size, self.time, self.wave_amplitude, returned_value=self.mode_select)
         
         return cloud
         
@@ -0,0 +1,212 @@
+import functools
+import os
+
+import numpy as np
+from scipy.interpolate import CubicSpline
+
+from thomson_scattering import analytic_atom_scattering, angle_free_atom_scattering
+
+default_table_directory = None
+""" The directory form factor tables are saved to and loaded from. When
+this is None, tables are only kept in memory. """
+
+class FormFactorTable:
+    """ A table of the scattering of a single atom, as computed by
+    'angle_free_atom_scattering', over a range of distances from the atom.
+
+    The scattered field oscillates with the distance from the atom as
+    exp(i * wavenumber * distance), which would need many samples per
+    wavelength to interpolate directly. The table instead stores the
+    field with this oscillation divided out, which varies slowly with the
+    distance and so can be interpolated accurately with few samples.
+
+    Attributes
+    ----------
+    wavelength : float
+        The wavelength of the incident light, in nanometers.
+    electron_shell : {"k", "l"}
+        The electron shell of the scattering electron.
+    offsets : np.array
+        The distances from the atom at which the scattering was computed,
+        in nanometers.
+    envelope : np.array of complex
+        The scattering at each of 'offsets', divided by
+        exp(i * wavenumber * offset).
+    """
+
+    def __init__(self, wavelength:float, electron_shell:str='k', max_offset:float=1, num_offsets:int=65, incident_field_strength:float=1, observation_time:float=0, mode:str="numerical", envelope:np.array=None) -> None:
+        """A constructor for the FormFactorTable class.
+
+        Parameters
+        ----------
+        wavelength : float
+            The wavelength of the incident light, in nanometers.
+        electron_shell : {"k", "l"}, optional
+            The electron shell of the scattering electron.
+        max_offset : float, optional
+            The largest distance from the atom the table covers, in
+            nanometers. The table covers every distance from zero to
+            'max_offset'.
+        num_offsets : int, optional
+            The number of distances at which the scattering is computed.
+        incident_field_strength : float, optional
+            The amplitude of the incident light's electric field, in
+            volts/meter.
+        observation_time : float, optional
+            The time at which the scattered light is observed, in seconds.
+        mode : {"numerical", "analytic"}, optional
+            Whether the scattering at each distance is integrated 
+            numerically by 'angle_free_atom_scattering', one distance at
+            a time, or computed with the closed form of 
+            'analytic_atom_scattering', for every distance at once. Only
+            the numerical integral is slow enough for a table to pay off;
+            evaluate the closed form directly rather than interpolating
+            an analytic table, which is only useful to check the 
+            interpolation against.
+        envelope : np.array of complex, optional
+            A previously computed 'envelope' for these parameters. If this
+            is not passed, it is computed as set by 'mode'.
+        """
+        self.wavelength = wavelength
+        self.electron_shell = electron_shell
+        self.max_offset = max_offset
+        self.incident_field_strength = incident_field_strength
+        self.observation_time = observation_time
+        self.mode = mode
+
+        self.wavenumber = 2*np.pi/wavelength
+        self.offsets = np.linspace(0, max_offset, num_offsets)
+
+        if envelope is None:
+            if mode == "analytic":
+                scattering = analytic_atom_scattering(incident_field_strength, wavelength, observation_time, electron_shell, self.offsets)
+            else:
+                scattering = np.array([angle_free_atom_scattering(incident_field_strength, wavelength, observation_time, electron_shell, offset, mode) for offset in self.offsets])
+            envelope = scattering * np.exp(-1j * self.wavenumber * self.offsets)
+        self.envelope = envelope
+
+        self.interpolator = CubicSpline(self.offsets, self.envelope)
+
+    def __call__(self, offsets:np.array) -> np.array:
+        """Returns the scattering of the atom at each of 'offsets'.
+
+        Parameters
+        ----------
+        offsets : np.array
+            The distances from the atom, in nanometers. These need to be
+            between zero and the table's 'max_offset'.
+
+        Returns
+        -------
+        np.array of complex
+            The scattered field at each distance.
+
+        Raises
+        ------
+        ValueError
+            If any of 'offsets' are outside of the range of the table.
+        """
+        offsets = np.asarray(offsets)
+        if np.any(offsets < 0) or np.any(offsets > self.max_offset):
+            raise ValueError("The passed offsets are outside of the range of the form factor table")
+
+        return self.interpolator(offsets) * np.exp(1j * self.wavenumber * offsets)
+
+    def get_filename(self) -> str:
+        """Returns the name of the file the table is saved to by 'save'.
+
+        Returns
+        -------
+        str
+            A file name which is unique to the parameters of the table.
+        """
+        return get_table_filename(self.wavelength, self.electron_shell, self.max_offset, len(self.offsets), self.incident_field_strength, self.observation_time, self.mode)
+
+    def save(self, directory:str) -> str:
+        """Saves the table to a .npz file in 'directory'.
+
+        Parameters
+        ----------
+        directory : str
+            The directory to save the table to.
+
+        Returns
+        -------
+        str
+            The path of the saved file.
+        """
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, self.get_filename())
+        np.savez_compressed(path, envelope=self.envelope)
+        return path
+
+def get_table_filename(wavelength:float, electron_shell:str, max_offset:float, num_offsets:int, incident_field_strength:float, observation_time:float, mode:str="numerical") -> str:
+    """Returns the name of the file a form factor table with the passed
+    parameters is saved to. See 'FormFactorTable' for a description of
+    the parameters."""
+    return f"form_factor_{wavelength!r}_{electron_shell}_{max_offset!r}_{num_offsets}_{incident_field_strength!r}_{observation_time!r}_{mode}.npz"
+
+@functools.lru_cache(maxsize=32)
+def load_form_factor_table(wavelength:float, electron_shell:str='k', max_offset:float=1, num_offsets:int=65, incident_field_strength:float=1, observation_time:float=0, mode:str="numerical", directory:str=None) -> FormFactorTable:
+    """Returns a form factor table with the passed parameters.
+
+    The most recently used tables are kept in memory, and if a
+    'directory' is passed, tables are loaded from it when they have been
+    saved before and are saved to it when they have not.
+
+    Parameters
+    ----------
+    directory : str, optional
+        The directory to load the table from, and save it to.
+
+    See Also
+    --------
+    FormFactorTable :
+        A description of the rest of the parameters.
+    """
+    if directory is not None:
+        path = os.path.join(directory, get_table_filename(wavelength, electron_shell, max_offset, num_offsets, incident_field_strength, observation_time, mode))
+        if os.path.exists(path):
+            with np.load(path) as saved_table:
+                return FormFactorTable(wavelength, electron_shell, max_offset, num_offsets, incident_field_strength, observation_time, mode, envelope=saved_table["envelope"])
+
+    table = FormFactorTable(wavelength, electron_shell, max_offset, num_offsets, incident_field_strength, observation_time, mode)
+    if directory is not None:
+        table.save(directory)
+    return table
+
+def get_form_factor_table(wavelength:float, electron_shell:str, max_offset:float) -> FormFactorTable:
+    """Returns a form factor table which covers every distance up to
+    'max_offset'.
+
+    The range of the returned table is rounded up to a power of two, so
+    that the same table is reused for similar distances.
+
+    Parameters
+    ----------
+    wavelength : float
+        The wavelength of the incident light, in nanometers.
+    electron_shell : {"k", "l"}
+        The electron shell of the scattering electron.
+    max_offset : float
+        The largest distance the table needs to cover, in nanometers.
+
+    Returns
+    -------
+    FormFactorTable
+        A table covering at least the distances from zero to 'max_offset'.
+    """
+    return load_form_factor_table(float(wavelength), electron_shell, get_table_range(max_offset), directory=default_table_directory)
+
+def get_table_range(max_offset:float) -> float:
+    """Returns 'max_offset' rounded up to a power of two, and to at least
+    one nanometer, which is the range of the table 'get_form_factor_table'
+    returns for it. Every 'max_offset' which rounds to the same range 
+    shares a table, both in memory and on disk."""
+    return float(2.0**np.ceil(np.log2(max(max_offset, 1))))
+
+def check_table_reuse():
+    #Point sets of a similar extent share a table, rather than each building their own
+    assert get_table_range(9e8) == get_table_range(1e9) == 2.0**30
+    assert get_form_factor_table(1.0, 'k', 9e8) is get_form_factor_table(1.0, 'k', 1e9)
+    assert get_form_factor_table(1.0, 'k', 1e9).max_offset >= 1e9
@@ -6,8 +6,11 @@ import numpy as np
 import matplotlib.pyplot as plt
 
 from diffraction_plot import DiffractionPlot
+from diffraction_plan import DiffractionPlan
+from render_cache import get_cache_key, get_render_cache
 
 import diffraction_plot
+
 def download_photo_51():
     subprocess.run(["wget", "https://upload.wikimedia.org/wikipedia/en/b/b2/Photo_51_x-ray_diffraction_image.jpg", "-O", "../materials/slideshow/images/photo_51.png"])
     subprocess.run(["convert", "../materials/slideshow/images/photo_51.png", "../materials/slideshow/images/photo_51.png"])
@@ -67,21 +70,32 @@ def slideshow():
 
     light_plot.main("../materials/slideshow/plots/light.png", (960, 540))
 
+def cached_meshgrid(plot:DiffractionPlot, angle:float, wavelength:float, min:float, max:float, step:float, x_shift:float, y_shift:float):
+    #The same parameters are hashed and passed on, so that the key can't drift from the computation
+    parameters = dict(angle=angle, wavelength=wavelength, min=min, max=max, step=step, x_shift=x_shift, y_shift=y_shift)
+    key = get_cache_key("calculate_meshgrid", plot.points, form_factor=plot.form_factor, **parameters)
+    return get_render_cache().get_or_compute(key, lambda: plot.calculate_meshgrid(**parameters))
+
 def slideshow_intense():
     plot = diffraction_plot.DiffractionPlot(0.070710678118)
-    plot.get_meshgrid(0.785398, 0.1, -5e8, 5e8, 1e7, 1e9, 1e9)
+    #These two plots share a grid, so the distances to it are only computed once
+    angles, wavelengths, grid = (0.785398, 0.785398), (0.1, 1), (-5e8, 5e8, 1e7, 1e9, 1e9)
+    plan_key = get_cache_key("DiffractionPlan.execute", plot.points, angles=angles, wavelengths=wavelengths, grid=grid, form_factor=plot.form_factor)
+    constructive, nonconstructive = get_render_cache().get_or_compute(plan_key, lambda: DiffractionPlan(plot, *grid).execute(angles, wavelengths))
+
+    plot.plot_meshgrid(constructive)
     plt.savefig("../materials/slideshow/images/constructive_atoms.png", dpi=300)
 
-    plot = diffraction_plot.DiffractionPlot(0.070710678118)
-    plot.get_meshgrid(0.785398, 1, -5e8, 5e8, 1e7, 1e9, 1e9)
+    plot.plot_meshgrid(nonconstructive)
     plt.savefig("../materials/slideshow/images/nonconstructive_atoms_wavelength.png", dpi=300)
 
     plot = diffraction_plot.DiffractionPlot(0.070710678118)
-    plot.get_meshgrid(0.785398, 0.1, -5e8, 5e8, 1e7, 4e9, 4e9)
+    plot.plot_meshgrid(cached_meshgrid(plot, 0.785398, 0.1, -5e8, 5e8, 1e7, 4e9, 4e9))
     plt.savefig("../materials/slideshow/images/nonconstructive_viewpoint_4cm.png", dpi=300)
 
     plot = diffraction_plot.DiffractionPlot(0.070710678118)
-    plot.get_meshgrid(0.785398, 0.1, -5e5, 5e5, 1e3, 1e9, 1e9)
+    plot.plot_meshgrid(cached_meshgrid(plot, 0.785398, 0.1, -5e5, 5e5, 1e3, 1e9, 1e9))
     plt.savefig("../materials/slideshow/images/nonconstructive_sizing.png", dpi=300)
+
 if __name__ == "__main__":
     slideshow_intense()
@@ -1,9 +1,9 @@
-from audioop import reverse
 import numpy as np
 import math
 
 from array_utils import exclude_indices, get_indices, fill_skipping
-from utils import rgb_to_mayavi
+from rotations import apply_rotation, axis_rotation_matrix, euler_rotation_matrix
+from affine_transform import AffineTransform
 
 def midpoint_formula(point_a:'tuple[int, int]', point_b:'tuple[int, int]') -> 'tuple[int, int]':
     """ An implementation of the midpoint formula in 2d.
@@ -126,27 +126,22 @@ def rotate_3d_points(points:np.array, angle:float, dimension:str, center_point:n
     x' = x*cos(a) - y*sin(a)
     y' = y*cos(a) + x*sin(a)
     
-    Where a is the magnitude of the rotation.
+    Where a is the magnitude of the rotation. The coordinates other than
+    'dimension' are used as (x, y), in (x, y, z) order.
+
+    See Also
+    --------
+    rotations.axis_rotation_matrix :
+        The matrix of this rotation, which is applied to every point in a
+        single matrix multiplication.
     """    
-
-    """ First we need to convert the 3d points into the points relevant
-    for the rotation around our desired axis. For this, we just remove
-    the point which represents the passed dimension """
-
-    rotated_points = np.zeros(points.shape)
-    for i, point in enumerate(points):
-        rotated_points[i] = rotate_3d_point(point, angle, center_point, dimension)
-    
-    return rotated_points
+    return apply_rotation(points, axis_rotation_matrix(angle, dimension), center_point)
 
 def rotate_by_euler(points:np.array, angles:tuple, center_point:tuple):
-
-    new_points = np.copy(points)
-    dimensions = ('x', 'y', 'z')
-    for i, angle in enumerate(angles):
-        new_points = rotate_3d_points(new_points, angle, dimensions[i], center_point)
-    
-    return new_points
+    """Returns a copy of 'points', rotated around 'center_point' on the
+    x, then the y, then the z axis by each of 'angles', with a single
+    composed rotation matrix. See 'rotate_3d_points'."""
+    return apply_rotation(points, euler_rotation_matrix(angles), center_point)
 
 
 def angle_between_points(point_a:tuple, point_b:tuple):
@@ -246,20 +241,46 @@ def get_2d_point(point:np.array, axis:str):
     return exclude_indices(point, (axis_index,))
 
 def get_2d_points(points:np.array, axis:str):
-    points_2d = np.zeros((len(points), 2))
-    for i, point in enumerate(points):
-        points_2d[i] = get_2d_point(point, axis)
-    return points_2d
+    points = np.asarray(points, dtype=float).reshape((-1, 3))
+    return np.delete(points, index_by_dimension[axis], axis=1)
 
 def slice_points(points:np.array, axis:str, slice_index:int):
+    points = np.asarray(points, dtype=float).reshape((-1, 3))
     axis_ind = index_by_dimension[axis]
-    points_2d = []
-    for point in points:
-        if point[axis_ind] == slice_index:
-            points_2d.append(point)
-    points_2d = np.array(points_2d)
 
-    return get_2d_points(points_2d, axis)
+    return get_2d_points(points[points[:, axis_ind] == slice_index], axis)
+
+def slice_point_blocks(blocks:'iterable', axis:str, slice_index:float, tolerance:float=0) -> np.array:
+    """Returns the points of a stream of 3d points which lie on a plane,
+    as 2d points. This is equivalent to 'slice_points' over every block
+    joined together, without the blocks ever being joined.
+
+    Parameters
+    ----------
+    blocks : iterable of np.array
+        The (points, 3) blocks of points to slice, such as those yielded by
+        'CrystalLattice.iter_blocks'.
+    axis : {"x", "y", "z"}
+        The axis the plane is perpendicular to.
+    slice_index : float
+        The coordinate of the plane along 'axis'.
+    tolerance : float, optional
+        The largest distance from the plane of a point which lies on it.
+        With the default of 0, only the points whose coordinate equals
+        'slice_index' exactly are returned.
+
+    Returns
+    -------
+    np.array
+        A (points, 2) array of the points on the plane, without their
+        coordinate along 'axis'.
+    """
+    axis_ind = index_by_dimension[axis]
+    on_plane = lambda coordinates: (coordinates >= slice_index - tolerance) & (coordinates <= slice_index + tolerance)
+    sliced_blocks = [np.delete(block[on_plane(block[:, axis_ind])], axis_ind, axis=1) for block in blocks]
+    if not sliced_blocks:
+        return np.zeros((0, 2))
+    return np.concatenate(sliced_blocks)
 
 def get_3d_cos_wave(len:float, num_points:int, amplitude:float, wavelength:float):
     # from mayavi import mlab
@@ -280,23 +301,52 @@ def get_3d_cos_wave(len:float, num_points:int, amplitude:float, wavelength:float
     # mlab.show() 
 
 def get_3d_cos_wave_between_points(coordinates:float, num_points:int, amplitude:float, wavelength:float, y_rotation:float):
-    length = math.dist(*coordinates)
-    non_rotated_wave = get_3d_cos_wave(length, num_points, amplitude, wavelength)
-    rotated_wave = rotate_3d_points(non_rotated_wave, y_rotation, 'y', coordinates[0])
+    return get_3d_cos_waves_between_points(np.asarray(coordinates)[np.newaxis], num_points, amplitude, wavelength, y_rotation)[0]
 
+def get_3d_cos_waves_between_points(coordinates:np.array, num_points:int, amplitude:float, wavelength:float, y_rotation:np.array) -> np.array:
+    """Returns a batch of waves, each of which runs between a pair of
+    points, as 'get_3d_cos_wave_between_points' does for one pair.
 
-    rotated_wave[:,0] += coordinates[0][0]
-    rotated_wave[:,1] += coordinates[0][1]
-    rotated_wave[:,2] += coordinates[0][2]
+    The rotations and translations which carry each wave from the y axis
+    to its pair of points are composed into a single AffineTransform, 
+    which is applied to every wave in one pass.
 
+    Parameters
+    ----------
+    coordinates : np.array
+        A (waves, 2, 3) array of the start and end point of each wave.
+    num_points : int
+        The number of points in each wave.
+    amplitude : float
+        The amplitude of the waves.
+    wavelength : float
+        The wavelength of the waves, in the units of the coordinates.
+    y_rotation : float or np.array
+        The rotation of each wave about its own axis, in radians. 
 
-    z_angle = -angle_between_points(list(reversed(get_2d_point(coordinates[0], 'z'))), list(reversed(get_2d_point(coordinates[1], 'z'))))
-    rotated_wave = rotate_3d_points(rotated_wave, z_angle, 'z', coordinates[0])
-
-    y_angle = angle_between_points(list((get_2d_point(coordinates[0], 'x'))), list((get_2d_point(coordinates[1], 'x'))))
-    rotated_wave = rotate_3d_points(rotated_wave, y_angle, 'x', coordinates[0])
-
-    return rotated_wave
+    Returns
+    -------
+    np.array
+        A (waves, points, 3) array of the points of each wave.
+    """
+    coordinates = np.asarray(coordinates, dtype=float)
+    start_points, end_points = coordinates[:, 0], coordinates[:, 1]
+    differences = end_points - start_points
+    lengths = np.hypot.reduce(differences, axis=-1)
+
+    y_points = np.linspace(0, lengths, num_points, axis=-1)
+    waves = np.stack((np.zeros_like(y_points), y_points, np.sin(((2*np.pi)/wavelength) * y_points) * amplitude), axis=-1)
+
+    #These are the angles 'angle_between_points' gives between the 2d points of each pair, with their z and then x coordinate removed
+    z_angles = -np.arccos(differences[:, 1] / np.hypot(differences[:, 0], differences[:, 1]))
+    x_angles = np.arccos(differences[:, 1] / np.hypot(differences[:, 1], differences[:, 2]))
+
+    transform = (AffineTransform()
+                 .rotate(axis_rotation_matrix(np.broadcast_to(y_rotation, lengths.shape), 'y'), start_points)
+                 .translate(start_points)
+                 .rotate(axis_rotation_matrix(z_angles, 'z'), start_points)
+                 .rotate(axis_rotation_matrix(x_angles, 'x'), start_points))
+    return transform.apply(waves)
 
 def rotate_2d_points(points:np.array, angle:float, center_point:tuple):
     new_points = np.zeros(points.shape)
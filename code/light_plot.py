@@ -3,7 +3,7 @@ from time import time
 import mayavi
 from mayavi import mlab
 from utils import rgb_to_mayavi
-from geometry_utils import get_3d_cos_wave_between_points
+from geometry_utils import get_3d_cos_waves_between_points
 
 import numpy as np
 
@@ -38,8 +38,7 @@ def plot_cylinder_line(
 
 def main(image_path=None, size=(300, 300)):
     endpoints = np.array([[0, 0, 0], [0, 4, 0]])
-    electric_field = get_3d_cos_wave_between_points(endpoints, 10000, 1, 1, 0)
-    magnetic_field = get_3d_cos_wave_between_points(endpoints, 10000, 1, 1, 0.5 * np.pi)
+    electric_field, magnetic_field = get_3d_cos_waves_between_points(np.array([endpoints, endpoints]), 10000, 1, 1, np.array([0, 0.5 * np.pi]))
 
     fig = mlab.figure(bgcolor=(1, 1, 1), fgcolor=(0.0, 0.0, 0.0), size=size)
 
@@ -4,6 +4,7 @@ from array_utils import fill_skipping
 
 from geometry_utils import index_by_dimension
 from thomson_scattering import scattering_by_angle
+from render_cache import get_cache_key, get_render_cache
 
 from tqdm import tqdm
 
@@ -17,7 +18,9 @@ radius = np.sqrt(xx ** 2 + yy ** 2)
 angle = np.arctan(np.abs(yy / xx))
 
 def get_amplitude_graph():
-    amplitude, phase = scattering_by_angle(angle, radius, 0, 1, 1)
+    #The grid is fully described by min1, max1 and step, which are much cheaper to hash than the grid itself, and by the formulas of this module
+    key = get_cache_key("get_amplitude_graph", min1=min1, max1=max1, step=step, wavelength=1, wave_amplitude=1, code_modules=("matplotlib_scattering",))
+    amplitude = get_render_cache().get_or_compute(key, lambda: scattering_by_angle(angle, radius, 0, 1, 1)[0])
     plt.imshow(amplitude*radius, origin='lower')
     col_bar = plt.colorbar()
     col_bar.ax.set_ylabel("Amplitude of Scattered Light, Volts/Meter")
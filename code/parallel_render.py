@@ -0,0 +1,130 @@
+import math
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from diffraction_plot import calculate_diffraction_field
+
+worker_points = None
+""" The lattice points of the pool a worker process belongs to, attached
+from shared memory when the worker starts """
+
+worker_memory = None
+
+def attach_points(memory_name:str, shape:tuple, dtype:str) -> None:
+    """Attaches a worker process to the lattice points shared by its
+    pool. This is used as the initializer of the pool's processes."""
+    global worker_points, worker_memory
+    worker_memory = shared_memory.SharedMemory(name=memory_name)
+    worker_points = np.ndarray(shape, dtype=dtype, buffer=worker_memory.buf)
+
+def evaluate_rows(atom_phasors:np.array, x_points:np.array, y_points:np.array, wavelength:float, form_factor:str, returned_value:str) -> np.array:
+    """Returns the field scattered by the shared lattice points over the
+    grid of 'x_points' and 'y_points'. This is the task run by each
+    worker process."""
+    xx, yy = np.meshgrid(x_points, y_points)
+    observation_points = np.stack((xx, yy), axis=-1)
+    return calculate_diffraction_field(worker_points, atom_phasors, observation_points, wavelength, form_factor=form_factor, returned_value=returned_value)
+
+class ParallelFieldEvaluator:
+    """ A pool of worker processes which evaluate the field scattered by
+    a fixed set of lattice points over grids of points of observation.
+
+    The lattice points are copied once into shared memory, which every
+    worker attaches to when it starts, rather than being sent to the
+    workers with each task. This should be used as a context manager, so
+    that the pool and the shared memory are released when it is done.
+
+    Attributes
+    ----------
+    points : np.array
+        The lattice points, as a view of the shared memory.
+    workers : int
+        The number of worker processes.
+    rows_per_task : int, optional
+        The number of rows of a grid evaluated by each task. If this is
+        None, each grid is split into four tasks per worker.
+    """
+
+    def __init__(self, points:np.array, workers:int, rows_per_task:int=None) -> None:
+        """A constructor for the ParallelFieldEvaluator class.
+
+        Parameters
+        ----------
+        points : np.array
+            A (atoms, 2) array of the position of each atom.
+        workers : int
+            The number of worker processes.
+        rows_per_task : int, optional
+            The number of rows of a grid evaluated by each task.
+        """
+        self.workers = workers
+        self.rows_per_task = rows_per_task
+
+        points = np.ascontiguousarray(points, dtype=float)
+        self.memory = shared_memory.SharedMemory(create=True, size=points.nbytes)
+        self.points = np.ndarray(points.shape, dtype=points.dtype, buffer=self.memory.buf)
+        self.points[:] = points
+
+        try:
+            self.executor = ProcessPoolExecutor(max_workers=workers, initializer=attach_points, initargs=(self.memory.name, points.shape, points.dtype.str))
+        except BaseException:
+            #The shared memory outlives this process unless it is unlinked
+            self.memory.close()
+            self.memory.unlink()
+            raise
+
+    def __enter__(self) -> 'ParallelFieldEvaluator':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Shuts down the worker processes and releases the shared memory."""
+        self.executor.shutdown()
+        #The view has to be released before the memory it points to
+        self.points = None
+        self.memory.close()
+        self.memory.unlink()
+
+    def calculate_diffraction_field(self, atom_phasors:np.array, x_points:np.array, y_points:np.array, wavelength:float, form_factor:str="analytic", returned_value:str="complex") -> np.array:
+        """Returns the field scattered by the lattice points over a grid of
+        points of observation, split over the worker processes by rows.
+
+        Parameters
+        ----------
+        atom_phasors : np.array
+            A complex array with one value per atom, which each atom's
+            scattered field is multiplied by.
+        x_points, y_points : np.array
+            The x coordinate of each column, and the y coordinate of each
+            row of the grid.
+        wavelength : float
+            The wavelength of the incident light, in nanometers.
+        form_factor : str, optional
+            The key in 'diffraction_plot.form_factors' of the function used
+            to compute the scattering of a single atom.
+        returned_value : [{"complex", "amplitude", "phase"}, optional]
+            The part of the scattered field to be returned.
+
+        Returns
+        -------
+        np.array
+            The requested part of the scattered field, indexed as [y][x].
+
+        See Also
+        --------
+        diffraction_plot.calculate_diffraction_field :
+            The function each worker evaluates its rows with.
+        """
+        rows_per_task = self.rows_per_task
+        if rows_per_task is None:
+            rows_per_task = max(1, math.ceil(len(y_points) / (4*self.workers)))
+
+        row_groups = [y_points[start:start+rows_per_task] for start in range(0, len(y_points), rows_per_task)]
+        num_tasks = len(row_groups)
+        results = self.executor.map(evaluate_rows, [atom_phasors]*num_tasks, [x_points]*num_tasks, row_groups, [wavelength]*num_tasks, [form_factor]*num_tasks, [returned_value]*num_tasks)
+
+        return np.concatenate(list(results), axis=0)
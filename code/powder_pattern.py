@@ -0,0 +1,151 @@
+import itertools
+
+import numpy as np
+
+def debye_sum(points:np.array, scattering_vectors:np.array, scattering_factor:complex=1) -> np.array:
+    """Returns the orientation averaged intensity scattered by 'points'
+    with the Debye scattering equation, summing over every pair of points
+    directly.
+
+    This takes O(points²) time and memory for each scattering vector, and
+    is meant as a reference for 'PowderPattern'.
+
+    Parameters
+    ----------
+    points : np.array
+        A (points, 3) array of the position of each atom.
+    scattering_vectors : np.array
+        The magnitudes of the scattering vector, q, to evaluate the
+        intensity at. These are in radians per unit of the points.
+    scattering_factor : complex, optional
+        The scattering factor of each atom.
+
+    Returns
+    -------
+    np.array
+        The intensity at each scattering vector.
+    """
+    distances = np.linalg.norm(points[:, np.newaxis, :] - points[np.newaxis, :, :], axis=2)
+    scattering_vectors = np.asarray(scattering_vectors, dtype=float)
+    intensity = np.array([np.sum(np.sinc(q*distances/np.pi)) for q in scattering_vectors.ravel()])
+    return abs(scattering_factor)**2 * intensity.reshape(scattering_vectors.shape)
+
+class PowderPattern:
+    """ The orientation averaged (powder) diffraction pattern of a group of
+    atoms, computed with the Debye scattering equation from a histogram of
+    the distances between every pair of atoms.
+
+    The histogram is built once, by computing the distances between
+    blocks of atoms at a time, so that the memory used is bounded by the
+    block size rather than the number of pairs. The intensity at any
+    number of scattering vectors is then a sum over the bins of the
+    histogram rather than over every pair of atoms.
+
+    Attributes
+    ----------
+    num_atoms : int
+        The number of atoms.
+    bin_width : float
+        The width of each bin of the histogram.
+    pair_counts : np.array
+        The number of pairs of distinct atoms whose distance falls into
+        each bin. Each pair is only counted once.
+    pair_distances : np.array
+        The mean distance of the pairs in each non-empty bin.
+    """
+
+    def __init__(self, points:np.array, bin_width:float=1e-3, block_size:int=4096) -> None:
+        """A constructor for the PowderPattern class.
+
+        Parameters
+        ----------
+        points : np.array or lattice
+            A (points, 3) array of the position of each atom, such as the
+            one returned by 'CrystalLattice.get_raw_points', or a lattice
+            with an 'iter_blocks' method, such as a LazyCrystalLattice. A
+            lattice is streamed a block at a time, and is never held in
+            memory as a whole.
+        bin_width : float, optional
+            The width of each bin of the histogram, in the units of the
+            points. Distances within a bin are represented by the mean
+            distance of the bin.
+        block_size : int, optional
+            The number of atoms in each block. At most two blocks of
+            (block_size x block_size) floats are held in memory at once.
+        """
+        if hasattr(points, "iter_blocks"):
+            iter_blocks = lambda start_block=0: itertools.islice((np.asarray(block, dtype=float) for block in points.iter_blocks(block_size)), start_block, None)
+        else:
+            points = np.asarray(points, dtype=float)
+            iter_blocks = lambda start_block=0: (points[start:start+block_size] for start in range(start_block*block_size, len(points), block_size))
+
+        #A first pass over the blocks finds the number, center and extent of the points
+        self.num_atoms = 0
+        point_sum = np.zeros(3)
+        min_point, max_point = np.full(3, np.inf), np.full(3, -np.inf)
+        for block in iter_blocks():
+            self.num_atoms += len(block)
+            point_sum += np.sum(block, axis=0)
+            min_point, max_point = np.minimum(min_point, np.min(block, axis=0)), np.maximum(max_point, np.max(block, axis=0))
+        center = point_sum / max(self.num_atoms, 1) #Centering the points keeps the expanded distance formula below precise
+        self.bin_width = bin_width
+
+        max_distance = np.linalg.norm(max_point - min_point) if self.num_atoms else 0
+        num_bins = int(max_distance // bin_width) + 1
+        pair_counts = np.zeros(num_bins, dtype=np.int64)
+        distance_sums = np.zeros(num_bins)
+
+        if not hasattr(points, "iter_blocks"):
+            #The points are already in memory, so they are centered once and the blocks are views of them
+            points = points - center
+            center = np.zeros(3)
+
+        for a_index, block_a in enumerate(iter_blocks()):
+            block_a = block_a - center
+            #Each pair of blocks is only visited once, so the inner loop starts at the outer block
+            for b_index, block_b in enumerate(iter_blocks(a_index), start=a_index):
+                block_b = block_b - center
+                distances = np.sqrt(np.maximum(np.sum(block_a**2, axis=1)[:, np.newaxis] + np.sum(block_b**2, axis=1)[np.newaxis, :] - 2*block_a@block_b.T, 0))
+
+                if a_index == b_index:
+                    #Only count the pairs above the diagonal, so each pair within a block is counted once
+                    distances = distances[np.triu_indices(len(block_a), k=1)]
+
+                bin_indices = np.minimum((distances // bin_width).astype(np.int64).ravel(), num_bins-1)
+                pair_counts += np.bincount(bin_indices, minlength=num_bins)
+                distance_sums += np.bincount(bin_indices, weights=distances.ravel(), minlength=num_bins)
+
+        occupied_bins = pair_counts > 0
+        self.pair_counts = pair_counts[occupied_bins]
+        self.pair_distances = distance_sums[occupied_bins] / self.pair_counts
+
+    def intensity(self, scattering_vectors:np.array, scattering_factor:complex=1, block_size:int=1024) -> np.array:
+        """Returns the orientation averaged intensity at each of
+        'scattering_vectors'.
+
+        Parameters
+        ----------
+        scattering_vectors : np.array
+            The magnitudes of the scattering vector, q, in radians per unit
+            of the points.
+        scattering_factor : complex, optional
+            The scattering factor of each atom.
+        block_size : int, optional
+            The number of scattering vectors to evaluate at once.
+
+        Returns
+        -------
+        np.array
+            The intensity at each scattering vector,
+            |f|² (N + 2 Σ n_b sin(q r_b)/(q r_b)), where n_b is the number
+            of pairs in bin b, and r_b their mean distance.
+        """
+        scattering_vectors = np.asarray(scattering_vectors, dtype=float)
+        flat_vectors = scattering_vectors.ravel()
+
+        intensity = np.zeros(len(flat_vectors))
+        for start in range(0, len(flat_vectors), block_size):
+            q = flat_vectors[start:start+block_size, np.newaxis]
+            intensity[start:start+block_size] = self.num_atoms + 2 * (np.sinc(q*self.pair_distances/np.pi) @ self.pair_counts)
+
+        return abs(scattering_factor)**2 * intensity.reshape(scattering_vectors.shape)
@@ -0,0 +1,281 @@
+""" A content addressed, on-disk cache of computed arrays. Run this
+script to list the cached entries, or to prune or clear the cache. """
+
+import argparse
+import ast
+import functools
+import glob
+import hashlib
+import os
+import time
+
+import numpy as np
+
+default_cache_directory = os.path.expanduser("~/.cache/diffraction_simulation")
+default_max_bytes = 2**32
+
+render_modules = ("diffraction_plot", "diffraction_plan", "thomson_scattering")
+""" The modules which compute the cached results by default """
+
+def get_module_dependencies(module_names:tuple) -> list:
+    """Returns the paths of the source of 'module_names', and of every
+    module of the simulation they import, directly or indirectly. Imports
+    inside functions are included.
+
+    Parameters
+    ----------
+    module_names : tuple of str
+        The names of modules in the directory of this module.
+
+    Returns
+    -------
+    list of str
+        The sorted paths of the source files.
+    """
+    code_directory = os.path.dirname(os.path.abspath(__file__))
+    found_paths = set()
+    pending_names = list(module_names)
+    while pending_names:
+        path = os.path.join(code_directory, pending_names.pop() + ".py")
+        #Modules which aren't in the directory, such as numpy, aren't part of the simulation
+        if path in found_paths or not os.path.exists(path):
+            continue
+        found_paths.add(path)
+
+        with open(path, "rb") as source_file:
+            tree = ast.parse(source_file.read())
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                pending_names.extend(alias.name.split(".")[0] for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.module is not None and node.level == 0:
+                pending_names.append(node.module.split(".")[0])
+    return sorted(found_paths)
+
+@functools.lru_cache()
+def get_code_version(module_names:tuple=render_modules) -> str:
+    """Returns a hash of the source of 'module_names' and every module of
+    the simulation they import, so that changing any of them invalidates
+    the cached results, while changing an unrelated module, such as
+    benchmarks.py, doesn't.
+
+    Returns
+    -------
+    str
+        The hexadecimal sha256 hash of the source files.
+    """
+    code_hash = hashlib.sha256()
+    for path in get_module_dependencies(module_names):
+        with open(path, "rb") as source_file:
+            code_hash.update(source_file.read())
+    return code_hash.hexdigest()
+
+@functools.lru_cache()
+def get_render_cache() -> 'RenderCache':
+    """Returns a RenderCache in the default directory, which is only made,
+    along with its directory, the first time it is requested."""
+    return RenderCache()
+
+def get_cache_key(name:str, *arrays:np.array, code_modules:tuple=render_modules, **parameters) -> str:
+    """Returns a key which identifies a computation by its inputs.
+
+    Parameters
+    ----------
+    name : str
+        The name of the computation.
+    *arrays : np.array
+        The array inputs of the computation, such as lattice points. These
+        are hashed by their data type, shape and contents.
+    code_modules : tuple of str, optional
+        The names of the modules which compute the result. The key
+        changes when the source of any of them, or of a module they
+        import, changes. See 'get_code_version'.
+    **parameters
+        The other inputs of the computation, which are hashed by their
+        repr.
+
+    Returns
+    -------
+    str
+        The hexadecimal sha256 hash of the name, the inputs, and the
+        version of the code.
+    """
+    key_hash = hashlib.sha256()
+    key_hash.update(name.encode())
+    key_hash.update(get_code_version(tuple(code_modules)).encode())
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        key_hash.update(f"{array.dtype.str}{array.shape}".encode())
+        key_hash.update(array.tobytes())
+    for parameter_name in sorted(parameters):
+        key_hash.update(f"{parameter_name}={parameters[parameter_name]!r}".encode())
+    return key_hash.hexdigest()
+
+class RenderCache:
+    """ A directory of compressed .npz files of computed arrays, named by
+    the key of the computation which produced them.
+
+    The cache is bounded in size. When it grows past 'max_bytes', the
+    least recently used entries are removed. The modification time of each
+    file is used as the time it was last used.
+
+    Attributes
+    ----------
+    directory : str
+        The directory the entries are stored in.
+    max_bytes : int
+        The largest total size of the entries, in bytes.
+    """
+
+    def __init__(self, directory:str=default_cache_directory, max_bytes:int=default_max_bytes) -> None:
+        """A constructor for the RenderCache class.
+
+        Parameters
+        ----------
+        directory : str, optional
+            The directory to store the entries in. This is created if it
+            does not exist.
+        max_bytes : int, optional
+            The largest total size of the entries, in bytes.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def get_path(self, key:str) -> str:
+        """Returns the path of the entry with 'key'."""
+        return os.path.join(self.directory, key + ".npz")
+
+    def load(self, key:str) -> np.array:
+        """Returns the array stored with 'key', or None if there isn't one.
+
+        Parameters
+        ----------
+        key : str
+            A key returned by 'get_cache_key'.
+
+        Returns
+        -------
+        np.array or None
+            The cached array.
+        """
+        path = self.get_path(key)
+        try:
+            with np.load(path) as entry:
+                array = entry["array"]
+        except (FileNotFoundError, OSError, ValueError, KeyError):
+            return None
+
+        os.utime(path) #Mark the entry as recently used
+        return array
+
+    def save(self, key:str, array:np.array) -> None:
+        """Stores 'array' with 'key', then removes the least recently used
+        entries if the cache is over its size limit.
+
+        Parameters
+        ----------
+        key : str
+            A key returned by 'get_cache_key'.
+        array : np.array
+            The array to store.
+        """
+        path = self.get_path(key)
+        with open(path + ".tmp", "wb") as entry_file:
+            np.savez_compressed(entry_file, array=array)
+        os.replace(path + ".tmp", path)
+        self.prune()
+
+    def get_or_compute(self, key:str, compute:'function') -> np.array:
+        """Returns the array stored with 'key', calling 'compute' and
+        storing its result if there isn't one.
+
+        Parameters
+        ----------
+        key : str
+            A key returned by 'get_cache_key'.
+        compute : function()
+            A function which computes the array.
+
+        Returns
+        -------
+        np.array
+            The cached or computed array.
+        """
+        array = self.load(key)
+        if array is None:
+            array = np.asarray(compute())
+            self.save(key, array)
+        return array
+
+    def get_entries(self) -> list:
+        """Returns the entries of the cache, from least to most recently
+        used.
+
+        Returns
+        -------
+        list of tuple (key, size, last_used)
+            The key of each entry, its size in bytes, and the time it was
+            last used as a Unix timestamp.
+        """
+        entries = []
+        for path in glob.glob(os.path.join(self.directory, "*.npz")):
+            stat = os.stat(path)
+            entries.append((os.path.basename(path)[:-len(".npz")], stat.st_size, stat.st_mtime))
+        return sorted(entries, key=lambda entry: entry[2])
+
+    def prune(self, max_bytes:int=None) -> int:
+        """Removes the least recently used entries until the cache is no
+        larger than 'max_bytes'.
+
+        Parameters
+        ----------
+        max_bytes : int, optional
+            The size to prune the cache to, in bytes. This defaults to the
+            cache's 'max_bytes'.
+
+        Returns
+        -------
+        int
+            The number of removed entries.
+        """
+        if max_bytes is None:
+            max_bytes = self.max_bytes
+
+        entries = self.get_entries()
+        total_bytes = sum(size for key, size, last_used in entries)
+        num_removed = 0
+        for key, size, last_used in entries:
+            if total_bytes <= max_bytes:
+                break
+            os.remove(self.get_path(key))
+            total_bytes -= size
+            num_removed += 1
+        return num_removed
+
+    def clear(self) -> int:
+        """Removes every entry of the cache, returning how many there were."""
+        return self.prune(0)
+
+def main(arguments:list=None) -> None:
+    parser = argparse.ArgumentParser(description="Inspect and prune the cache of computed diffraction and scattering arrays.")
+    parser.add_argument("--directory", default=default_cache_directory, help="the directory of the cache")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("list", help="list the entries, from least to most recently used")
+    prune_parser = subparsers.add_parser("prune", help="remove the least recently used entries")
+    prune_parser.add_argument("--max-bytes", type=int, default=default_max_bytes, help="the size to prune the cache to")
+    subparsers.add_parser("clear", help="remove every entry")
+    arguments = parser.parse_args(arguments)
+
+    cache = RenderCache(arguments.directory)
+    if arguments.command == "list":
+        entries = cache.get_entries()
+        for key, size, last_used in entries:
+            print(f"{key}  {size:>12}  {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(last_used))}")
+        print(f"{len(entries)} entries, {sum(entry[1] for entry in entries)} bytes")
+    elif arguments.command == "prune":
+        print(f"Removed {cache.prune(arguments.max_bytes)} entries")
+    elif arguments.command == "clear":
+        print(f"Removed {cache.clear()} entries")
+
+if __name__ == "__main__":
+    main()
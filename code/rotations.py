@@ -0,0 +1,181 @@
+""" Rotation matrices and quaternions, and their application to arrays of
+3d points.
+
+The rotation about a single axis follows the convention of
+'geometry_utils.rotate_3d_points': the two remaining coordinates (a, b),
+in (x, y, z) order, are rotated as
+
+a' = a*cos(θ) - b*sin(θ)
+b' = b*cos(θ) + a*sin(θ)
+
+which is a right handed rotation about the x and z axes, and a left
+handed rotation about the y axis. Axis-angle rotations and quaternions
+are always right handed. """
+
+import numpy as np
+
+def axis_rotation_matrix(angle:float, dimension:str) -> np.array:
+    """Returns the matrix of a rotation about one of the coordinate axes,
+    in the convention of 'geometry_utils.rotate_3d_points'.
+
+    Parameters
+    ----------
+    angle : float or np.array
+        The angle of rotation, in radians. An array of angles gives one
+        matrix per angle.
+    dimension : {"x", "y", "z"}
+        The axis to rotate about.
+
+    Returns
+    -------
+    np.array
+        A (..., 3, 3) array of rotation matrices, with the shape of
+        'angle' as its leading dimensions.
+    """
+    if dimension not in ('x', 'y', 'z'):
+        raise ValueError("dimension must be either x, y, or z")
+    axis_ind = ('x', 'y', 'z').index(dimension)
+    a, b = (i for i in range(3) if i != axis_ind)
+
+    angle = np.asarray(angle, dtype=float)
+    cos_angle, sin_angle = np.cos(angle), np.sin(angle)
+    matrix = np.zeros(angle.shape + (3, 3))
+    matrix[..., axis_ind, axis_ind] = 1
+    matrix[..., a, a] = cos_angle
+    matrix[..., a, b] = -sin_angle
+    matrix[..., b, a] = sin_angle
+    matrix[..., b, b] = cos_angle
+    return matrix
+
+def euler_rotation_matrix(angles:np.array) -> np.array:
+    """Returns the single matrix of rotating about the x, then the y, then
+    the z axis, as 'geometry_utils.rotate_by_euler' does.
+
+    Parameters
+    ----------
+    angles : np.array
+        A (..., 3) array of the angles of rotation about the x, y and z
+        axes, in radians.
+
+    Returns
+    -------
+    np.array
+        A (..., 3, 3) array of rotation matrices.
+    """
+    angles = np.asarray(angles, dtype=float)
+    return compose_rotations(*(axis_rotation_matrix(angles[..., i], dimension) for i, dimension in enumerate(('x', 'y', 'z'))))
+
+def axis_angle_matrix(axis:np.array, angle:float) -> np.array:
+    """Returns the matrix of a right handed rotation by 'angle' about
+    'axis', with Rodrigues' rotation formula.
+
+    Parameters
+    ----------
+    axis : np.array
+        A (..., 3) array of the axes of rotation. These don't need to be
+        normalized.
+    angle : float or np.array
+        The angles of rotation, in radians, broadcast against the leading
+        dimensions of 'axis'.
+
+    Returns
+    -------
+    np.array
+        A (..., 3, 3) array of rotation matrices.
+
+    Notes
+    -----
+    R = I + sin(θ)K + (1 - cos(θ))K²
+
+    Where K is the cross product matrix of the normalized axis.
+    """
+    axis = np.asarray(axis, dtype=float)
+    axis = axis / np.linalg.norm(axis, axis=-1, keepdims=True)
+    angle = np.asarray(angle, dtype=float)[..., np.newaxis, np.newaxis]
+
+    x, y, z = axis[..., 0], axis[..., 1], axis[..., 2]
+    zeros = np.zeros_like(x)
+    cross_matrix = np.stack((np.stack((zeros, -z, y), axis=-1), np.stack((z, zeros, -x), axis=-1), np.stack((-y, x, zeros), axis=-1)), axis=-2)
+    return np.eye(3) + np.sin(angle)*cross_matrix + (1 - np.cos(angle))*(cross_matrix @ cross_matrix)
+
+def axis_angle_quaternion(axis:np.array, angle:float) -> np.array:
+    """Returns the unit quaternion (w, x, y, z) of a right handed rotation
+    by 'angle' about 'axis'.
+
+    Parameters
+    ----------
+    axis : np.array
+        A (..., 3) array of the axes of rotation. These don't need to be
+        normalized.
+    angle : float or np.array
+        The angles of rotation, in radians, broadcast against the leading
+        dimensions of 'axis'.
+
+    Returns
+    -------
+    np.array
+        A (..., 4) array of quaternions.
+    """
+    axis = np.asarray(axis, dtype=float)
+    axis = axis / np.linalg.norm(axis, axis=-1, keepdims=True)
+    half_angle = np.asarray(angle, dtype=float)[..., np.newaxis] / 2
+    vector_part = np.sin(half_angle)*axis
+    return np.concatenate((np.broadcast_to(np.cos(half_angle), vector_part.shape[:-1] + (1,)), vector_part), axis=-1)
+
+def multiply_quaternions(quaternion_a:np.array, quaternion_b:np.array) -> np.array:
+    """Returns the Hamilton product of two (..., 4) arrays of quaternions
+    (w, x, y, z). As rotations, the product rotates by 'quaternion_b',
+    then by 'quaternion_a'."""
+    w_a, x_a, y_a, z_a = np.moveaxis(np.asarray(quaternion_a, dtype=float), -1, 0)
+    w_b, x_b, y_b, z_b = np.moveaxis(np.asarray(quaternion_b, dtype=float), -1, 0)
+    return np.stack((w_a*w_b - x_a*x_b - y_a*y_b - z_a*z_b,
+                     w_a*x_b + x_a*w_b + y_a*z_b - z_a*y_b,
+                     w_a*y_b - x_a*z_b + y_a*w_b + z_a*x_b,
+                     w_a*z_b + x_a*y_b - y_a*x_b + z_a*w_b), axis=-1)
+
+def quaternion_matrix(quaternion:np.array) -> np.array:
+    """Returns the rotation matrix of each of a (..., 4) array of
+    quaternions (w, x, y, z). The quaternions are normalized first.
+
+    Returns
+    -------
+    np.array
+        A (..., 3, 3) array of rotation matrices.
+    """
+    quaternion = np.asarray(quaternion, dtype=float)
+    w, x, y, z = np.moveaxis(quaternion / np.linalg.norm(quaternion, axis=-1, keepdims=True), -1, 0)
+    return np.stack((np.stack((1 - 2*(y*y + z*z), 2*(x*y - w*z), 2*(x*z + w*y)), axis=-1),
+                     np.stack((2*(x*y + w*z), 1 - 2*(x*x + z*z), 2*(y*z - w*x)), axis=-1),
+                     np.stack((2*(x*z - w*y), 2*(y*z + w*x), 1 - 2*(x*x + y*y)), axis=-1)), axis=-2)
+
+def compose_rotations(*matrices:np.array) -> np.array:
+    """Returns the single matrix of applying each of 'matrices' in turn,
+    the first one first. Batches of (..., 3, 3) matrices are broadcast
+    against each other."""
+    composed = np.eye(3)
+    for matrix in matrices:
+        composed = np.asarray(matrix) @ composed
+    return composed
+
+def apply_rotation(points:np.array, matrix:np.array, center_point:np.array=(0, 0, 0)) -> np.array:
+    """Returns a copy of 'points', rotated by 'matrix' around
+    'center_point', in a single matrix multiplication.
+
+    Parameters
+    ----------
+    points : np.array
+        A (points, 3) array of the points to rotate.
+    matrix : np.array
+        A (3, 3) rotation matrix, or a (..., 3, 3) batch of them to rotate
+        the points by each of.
+    center_point : np.array, optional
+        The point to rotate the points around.
+
+    Returns
+    -------
+    np.array
+        A (..., points, 3) array of the rotated points, with one set of
+        points for each matrix.
+    """
+    center_point = np.asarray(center_point, dtype=float)
+    return (np.asarray(points, dtype=float) - center_point) @ np.swapaxes(matrix, -1, -2) + center_point
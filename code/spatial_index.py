@@ -0,0 +1,130 @@
+import numpy as np
+
+from geometry_utils import index_by_dimension
+
+class SpatialIndex:
+    """ An index over a fixed set of 3d points, which answers plane
+    slices, box queries and radius queries without testing every point.
+
+    Plane slices and box queries use a copy of the points sorted along
+    each axis, which is only made the first time that axis is queried.
+    The points within a range of coordinates along an axis are then a
+    contiguous run of the sorted copy, found by binary search, so a plane
+    slice is returned as a view of it. Radius queries use a KD-tree, which
+    is also only built the first time it is needed.
+
+    Attributes
+    ----------
+    points : np.array
+        The (points, 3) array of indexed points.
+    """
+
+    def __init__(self, points:np.array) -> None:
+        """A constructor for the SpatialIndex class.
+
+        Parameters
+        ----------
+        points : np.array
+            A (points, 3) array of the points to index. These shouldn't be
+            modified while the index is in use.
+        """
+        self.points = np.asarray(points, dtype=float).reshape((-1, 3))
+        self.sorted_orders = {}
+        self.sorted_points = {}
+        self.tree = None
+
+    def get_sorted(self, axis_ind:int) -> 'tuple[np.array, np.array]':
+        """Returns the points sorted along an axis, and the index in
+        'points' of each sorted point.
+
+        Parameters
+        ----------
+        axis_ind : int
+            The index of the axis to sort along.
+
+        Returns
+        -------
+        tuple (sorted_points, order)
+            The (points, 3) sorted points, and the index of each of them
+            in 'points'.
+        """
+        if axis_ind not in self.sorted_points:
+            order = np.argsort(self.points[:, axis_ind], kind="stable")
+            self.sorted_orders[axis_ind] = order
+            self.sorted_points[axis_ind] = self.points[order]
+        return self.sorted_points[axis_ind], self.sorted_orders[axis_ind]
+
+    def get_axis_range(self, axis_ind:int, min_value:float, max_value:float) -> 'tuple[int, int]':
+        """Returns the start and stop of the run of points, sorted along
+        'axis_ind', whose coordinate along it is between 'min_value' and
+        'max_value', inclusive."""
+        sorted_points, order = self.get_sorted(axis_ind)
+        coordinates = sorted_points[:, axis_ind]
+        return np.searchsorted(coordinates, min_value, side="left"), np.searchsorted(coordinates, max_value, side="right")
+
+    def slice_plane(self, axis:str, value:float, tolerance:float=0) -> np.array:
+        """Returns the points which lie on a plane perpendicular to an
+        axis.
+
+        Parameters
+        ----------
+        axis : {"x", "y", "z"}
+            The axis the plane is perpendicular to.
+        value : float
+            The coordinate of the plane along 'axis'.
+        tolerance : float, optional
+            The largest distance from the plane of a point which lies on
+            it. With the default of 0, only the points whose coordinate
+            equals 'value' exactly are returned.
+
+        Returns
+        -------
+        np.array
+            A (points, 3) view of the points on the plane, ordered by
+            their coordinate along 'axis', and otherwise in the order of
+            'points'.
+        """
+        axis_ind = index_by_dimension[axis]
+        start, stop = self.get_axis_range(axis_ind, value - tolerance, value + tolerance)
+        return self.get_sorted(axis_ind)[0][start:stop]
+
+    def get_2d_slice(self, axis:str, value:float, tolerance:float=0) -> np.array:
+        """Returns the points on a plane as 2d points, without their
+        coordinate along 'axis'. See 'slice_plane'."""
+        return np.delete(self.slice_plane(axis, value, tolerance), index_by_dimension[axis], axis=1)
+
+    def query_box(self, min_point:np.array, max_point:np.array) -> np.array:
+        """Returns the indices of the points inside an axis aligned box.
+
+        Only the points within the box's range along its most selective
+        axis are tested against the other two axes.
+
+        Parameters
+        ----------
+        min_point, max_point : np.array
+            The (x, y, z) corners of the box with the smallest and largest
+            coordinates. Points on the faces of the box are inside it.
+
+        Returns
+        -------
+        np.array of int
+            The indices in 'points' of the points inside the box, in
+            ascending order.
+        """
+        min_point, max_point = np.asarray(min_point, dtype=float), np.asarray(max_point, dtype=float)
+        ranges = [self.get_axis_range(axis_ind, min_point[axis_ind], max_point[axis_ind]) for axis_ind in range(3)]
+        axis_ind = int(np.argmin([stop - start for start, stop in ranges]))
+        start, stop = ranges[axis_ind]
+
+        sorted_points, order = self.get_sorted(axis_ind)
+        candidates = sorted_points[start:stop]
+        inside = np.all((candidates >= min_point) & (candidates <= max_point), axis=1)
+        return np.sort(order[start:stop][inside])
+
+    def query_radius(self, center:np.array, radius:float) -> np.array:
+        """Returns the indices of the points within 'radius' of 'center',
+        in ascending order."""
+        if self.tree is None:
+            from scipy.spatial import cKDTree
+            self.tree = cKDTree(self.points)
+        return np.array(self.tree.query_ball_point(center, radius, return_sorted=True), dtype=int)
@@ -0,0 +1,198 @@
+import weakref
+
+import numpy as np
+
+from unit_cell import UnitCell
+
+def get_miller_indices(max_index:int) -> np.array:
+    """Returns every set of Miller indices (h, k, l) with each index
+    between -'max_index' and 'max_index', other than (0, 0, 0).
+
+    Parameters
+    ----------
+    max_index : int
+        The largest absolute value of each index.
+
+    Returns
+    -------
+    np.array
+        A (reflections, 3) integer array of Miller indices.
+    """
+    index_range = np.arange(-max_index, max_index+1)
+    miller_indices = np.stack(np.meshgrid(index_range, index_range, index_range, indexing="ij"), axis=-1).reshape((-1, 3))
+    return miller_indices[np.any(miller_indices != 0, axis=1)]
+
+def get_basis(unit_cell:UnitCell) -> np.array:
+    """Returns the distinct atoms of a unit cell, in fractional
+    coordinates.
+
+    The points of a UnitCell include atoms on its corners and faces,
+    which are shared with the neighbouring cells. Wrapping each point
+    into [0, 1) maps the shared atoms onto the same position, so each
+    atom of the crystal is only counted once.
+
+    Parameters
+    ----------
+    unit_cell : UnitCell
+        A unit cell whose 'all_points' are fractional coordinates, as is
+        the case for those made by UnitCell's factory methods.
+
+    Returns
+    -------
+    np.array
+        A (atoms, 3) array of the fractional coordinates of each distinct
+        atom.
+    """
+    fractional_points = np.mod(np.round(unit_cell.all_points, 9), 1)
+    return np.unique(fractional_points, axis=0)
+
+class StructureFactor:
+    """ The structure factor of a unit cell, F(hkl), which is the sum of
+    exp(2πi (hx + ky + lz)) over the fractional coordinates (x, y, z) of
+    each distinct atom of the cell.
+
+    Attributes
+    ----------
+    unit_cell : UnitCell
+        The unit cell the structure factor is computed for.
+    basis : np.array
+        The fractional coordinates of each distinct atom of the cell, as
+        returned by 'get_basis'.
+    scattering_factor : complex
+        The scattering factor of each atom.
+    """
+
+    def __init__(self, unit_cell:UnitCell, scattering_factor:complex=1) -> None:
+        """A constructor for the StructureFactor class.
+
+        Parameters
+        ----------
+        unit_cell : UnitCell
+            The unit cell to compute the structure factor of.
+        scattering_factor : complex, optional
+            The scattering factor of each atom.
+
+        See Also
+        --------
+        get_structure_factor :
+            Returns a cached StructureFactor for a unit cell.
+        """
+        self.unit_cell = unit_cell
+        self.basis = get_basis(unit_cell)
+        self.scattering_factor = scattering_factor
+
+    def __call__(self, miller_indices:np.array) -> np.array:
+        """Returns the structure factor of each set of Miller indices.
+
+        Parameters
+        ----------
+        miller_indices : np.array
+            A (..., 3) array of Miller indices.
+
+        Returns
+        -------
+        np.array of complex
+            F(hkl) for each set of Miller indices.
+        """
+        phases = 2*np.pi * (np.asarray(miller_indices) @ self.basis.T)
+        return self.scattering_factor * np.sum(np.exp(1j*phases), axis=-1)
+
+    def get_d_spacings(self, miller_indices:np.array) -> np.array:
+        """Returns the spacing between the lattice planes of each set of
+        Miller indices, in the units of the unit cell's size.
+
+        Parameters
+        ----------
+        miller_indices : np.array
+            A (..., 3) array of Miller indices.
+
+        Returns
+        -------
+        np.array
+            The d-spacing of each set of Miller indices,
+            1/sqrt((h/a)² + (k/b)² + (l/c)²).
+        """
+        return 1 / np.sqrt(np.sum((np.asarray(miller_indices) / np.array(self.unit_cell.size))**2, axis=-1))
+
+    def get_bragg_angles(self, miller_indices:np.array, wavelength:float) -> np.array:
+        """Returns the Bragg angle of each set of Miller indices.
+
+        Parameters
+        ----------
+        miller_indices : np.array
+            A (..., 3) array of Miller indices.
+        wavelength : float
+            The wavelength of the incident light, in the units of the unit
+            cell's size.
+
+        Returns
+        -------
+        np.array
+            The angle θ, in radians, which satisfies Bragg's law
+            wavelength = 2d sin(θ). This is NaN for planes whose spacing is
+            too small to diffract at 'wavelength'.
+        """
+        sin_angle = wavelength / (2*self.get_d_spacings(miller_indices))
+        with np.errstate(invalid="ignore"):
+            return np.arcsin(sin_angle)
+
+    def get_reflections(self, max_index:int, wavelength:float=None, min_amplitude:float=1e-9) -> dict:
+        """Returns every reflection of the unit cell up to 'max_index'
+        which isn't extinguished by its structure factor.
+
+        Parameters
+        ----------
+        max_index : int
+            The largest absolute value of each Miller index.
+        wavelength : float, optional
+            The wavelength of the incident light. If this is passed, only
+            reflections which diffract at this wavelength are returned,
+            along with their Bragg angle.
+        min_amplitude : float, optional
+            The amplitude below which a reflection is considered
+            extinguished.
+
+        Returns
+        -------
+        dict of np.array
+            The "miller_indices", "structure_factors" and "d_spacings" of
+            each reflection, and their "bragg_angles" if a wavelength was
+            passed.
+        """
+        miller_indices = get_miller_indices(max_index)
+        structure_factors = self(miller_indices)
+        d_spacings = self.get_d_spacings(miller_indices)
+
+        present = np.abs(structure_factors) > min_amplitude
+        reflections = {}
+        if wavelength is not None:
+            bragg_angles = self.get_bragg_angles(miller_indices, wavelength)
+            present &= ~np.isnan(bragg_angles)
+            reflections["bragg_angles"] = bragg_angles[present]
+
+        reflections["miller_indices"] = miller_indices[present]
+        reflections["structure_factors"] = structure_factors[present]
+        reflections["d_spacings"] = d_spacings[present]
+        return reflections
+
+structure_factors_by_unit_cell = weakref.WeakKeyDictionary()
+""" The StructureFactor of each unit cell 'get_structure_factor' has been
+called with """
+
+def get_structure_factor(unit_cell:UnitCell) -> StructureFactor:
+    """Returns the StructureFactor of a unit cell, which is only computed
+    the first time it is requested for that unit cell.
+
+    Parameters
+    ----------
+    unit_cell : UnitCell
+        The unit cell to return the structure factor of.
+
+    Returns
+    -------
+    StructureFactor
+        The structure factor of 'unit_cell'.
+    """
+    if unit_cell not in structure_factors_by_unit_cell:
+        structure_factors_by_unit_cell[unit_cell] = StructureFactor(unit_cell)
+    return structure_factors_by_unit_cell[unit_cell]
@@ -1,30 +1,55 @@
-from math import atan2, dist
-from random import random
+from math import dist
 import numpy as np
-import scipy as sp
-
-from astropy import constants
-from astropy import units as u
-
-from scipy import integrate
+from scipy import constants
 
 import wave_conversions as wc
 
-import cmath
-
 from geometry_utils import angle_between_lines, index_by_dimension
 from array_utils import get_different_index, get_indices, num_differences
-from utils import graph_3d_function, graph_function, integrate_function_simpson
 
-from numba import njit
+from numba import njit, vectorize
+
+classical_electron_radius = 2.8179403262e-15 #in meters
+
+wavelength_code, wavenumber_code, angular_frequency_code = wc.unit_codes["wavelength"], wc.unit_codes["wavenumber"], wc.unit_codes["angular_frequency"]
+
+@njit(cache=True)
+def scattered_amplitude(angle_of_observation:float, distance_from_scattering:float, wave_amplitude:float) -> float:
+    """Returns the amplitude of the field scattered by an electron, see
+    'scattering_by_angle'. This is negative where the cosine of the angle
+    is."""
+    return (wave_amplitude * classical_electron_radius) / distance_from_scattering * np.cos(angle_of_observation)
+
+@njit(cache=True)
+def scattered_phase(distance_from_scattering:float, observation_time:float, wavelength:float) -> float:
+    """Returns the phase of the field scattered by an electron, see 
+    'scattering_by_angle'."""
+    frequency = wc.freq_from_unit_code(wavelength, wavelength_code)
+    wavenumber = wc.unit_code_from_freq(frequency, wavenumber_code)
+    angular_frequency = wc.unit_code_from_freq(frequency, angular_frequency_code)
+    return wavenumber * distance_from_scattering - angular_frequency * observation_time
+
+@njit(cache=True)
+def scattered_field(angle_of_observation:float, distance_from_scattering:float, observation_time:float, wavelength:float, wave_amplitude:float) -> complex:
+    """Returns the complex field scattered by an electron, see
+    'scattering_by_angle'."""
+    amplitude = scattered_amplitude(angle_of_observation, distance_from_scattering, wave_amplitude)
+    phase = scattered_phase(distance_from_scattering, observation_time, wavelength)
+    return complex(amplitude * np.cos(phase), amplitude * np.sin(phase))
+
+#These are the ufuncs of the scalar kernels above, which broadcast over arrays. They are compiled for each combination of input types on their first call
+scattered_amplitude_ufunc = vectorize(cache=True)(scattered_amplitude)
+scattered_phase_ufunc = vectorize(cache=True)(scattered_phase)
+scattered_field_ufunc = vectorize(cache=True)(scattered_field)
 
-#TODO, make this method return phase and amplitude
-#@njit()
 def scattering_by_angle(angle_of_observation:float, distance_from_scattering:float, observation_time:float, wavelength:float, wave_amplitude:float, returned_value="amplitude/cos") -> float:
     """ Finds the amplitude of Thomson scattering from a certain
     point in space. This point is described in terms of the 
     'angle_of_observation', and 'distance_from_scattering'.
-    
+
+    Each of the numerical parameters can be a numpy array, in which case
+    they are broadcast against each other, and the scattering is computed
+    by compiled ufuncs.
     
     Parameters
     ---------- 
@@ -44,49 +69,53 @@ def scattering_by_angle(angle_of_observation:float, distance_from_scattering:flo
     wave_amplitude : float 
         The strength of the incident electric field. This should be 
         described in volts/meter.
-    returned_value : [{"real", "imaginary" "amplitude", "phase", "complex"}, optional]
+    returned_value : [{"amplitude/cos", "amplitude", "phase", "complex", "real", "imaginary"}, optional]
         The part of the scattered wave to be returned
-    round_cos : bool
-        If True, the cosine value which attenuates the scattering will be
-        rounded. Note that while this does make the values of the function
-        more predictable, it does have a significant effect on performance
-        when this function is called many times.
+
     Returns
     -------
+    amplitude/cos : tuple of float
+        A tuple of the amplitude and phase of the wave at the described
+        point (amplitude, phase)
     amplitude : float
         The amplitude of the scattered electric field at the passed 
-        point. This is described in volts/meter (assuming you passed the
-        right units).
-    phase: float
+        point, including the cosine of the angle of observation, so that
+        it is negative beyond a right angle. This is described in 
+        volts/meter (assuming you passed the right units).
+    phase : float
         The phase of the scattered electric field at the passed point.
         This is described in radians (assuming you passed the right
         units)
-    both : tuple of float
-        A tuple of the amplitude and phase of the wave at the described
-        point (amplitude, phase)
-    
+    complex : complex
+        The scattered electric field, amplitude * exp(i * phase).
+    real, imaginary : float
+        The real or imaginary part of the scattered electric field.
     
     See Also
     --------
-    amplitude_by_space : 
+    scattering_by_space : 
         A wrapper around this function, which uses points in 3d space
         rather than the 'angle_of_observation' and 
         'distance_from-scattering'. 
+    scattered_field :
+        The compiled scalar kernel of this function, which can be called
+        from other compiled functions.
     """
-    
-    # thomson_scattering_length = sp.constants.value("classical electron radius")
-
-    classical_electron_radius = 2.8179403262e-15
-    amplitude = (wave_amplitude * classical_electron_radius) / distance_from_scattering * np.cos(angle_of_observation)
-
-    wavenumber = wc.convert(wavelength, "wavelength", "wavenumber")
-    angular_frequency = wc.convert(wavelength, "wavelength", "angular_frequency")
-    phase = wavenumber * distance_from_scattering - angular_frequency * observation_time
-
     if returned_value == "amplitude/cos":
-        return amplitude, phase
-    elif returned_value == "complex":
-        return cmath.rect(amplitude, phase)
+        return scattered_amplitude_ufunc(angle_of_observation, distance_from_scattering, wave_amplitude), scattered_phase_ufunc(distance_from_scattering, observation_time, wavelength)
+    elif returned_value == "amplitude":
+        return scattered_amplitude_ufunc(angle_of_observation, distance_from_scattering, wave_amplitude)
+    elif returned_value == "phase":
+        return scattered_phase_ufunc(distance_from_scattering, observation_time, wavelength)
+    elif returned_value in ("complex", "real", "imaginary"):
+        field = scattered_field_ufunc(angle_of_observation, distance_from_scattering, observation_time, wavelength, wave_amplitude)
+        if returned_value == "real":
+            return field.real
+        elif returned_value == "imaginary":
+            return field.imag
+        return field
+    else:
+        raise ValueError("returned_value must be either amplitude/cos, amplitude, phase, complex, real, or imaginary")
 
 def scattering_by_space(scattering_point:tuple, observation_point:tuple, wavevector_origin:tuple, observation_time:float, wave_amplitude:float, polarization_of_electric_field="z", returned_value="amplitude") -> float:
     """ Finds the amplitude of Thomson scattering based on several points
@@ -134,6 +163,9 @@ def scattering_by_space(scattering_point:tuple, observation_point:tuple, wavevec
         scattering based on the distance from the source of scattering,
         and the angle of the observation point in respect to the 
         incident light.
+    scattering_by_points :
+        Computes the scattering at an array of points of observation at
+        once, for any direction of the incident light and polarization.
     """
 
     distance_from_scattering = dist(scattering_point, observation_point)
@@ -162,8 +194,103 @@ def scattering_by_space(scattering_point:tuple, observation_point:tuple, wavevec
     return scattering_by_angle(angle_of_observation=respective_angle, distance_from_scattering=distance_from_scattering, observation_time=observation_time,
     wavelength=wavelength, wave_amplitude=wave_amplitude, returned_value=returned_value)
 
+def scattering_by_points(scattering_point:np.array, observation_points:np.array, wavevector_origin:np.array, observation_time:float, wave_amplitude:float, polarization_of_electric_field="z", returned_value="amplitude") -> np.array:
+    """ Finds the Thomson scattering from a single point at every one of
+    an array of points of observation, with vector algebra in place of
+    the per-point 2d projections of 'scattering_by_space'.
+
+    The incident light travels from 'wavevector_origin' to 
+    'scattering_point', in any direction, and may be polarized in any
+    direction perpendicular to it. The angle of observation is the one
+    'scattering_by_space' finds between the incident line and the line
+    from the point of scattering to the point of observation, projected
+    onto the plane of the incident direction d and the polarization ε,
+
+    θ = π - |arctan(slope(d) - slope(n))|
+
+    where n is the displacement of the point of observation, and the
+    slope of a vector v is (v·e2)/(v·e1), or infinity where v·e1 is 0. 
+    When the incident light travels along an axis and is polarized along
+    another one, as 'scattering_by_space' requires, e1 and e2 are those
+    two axes in (x, y, z) order, so that the results are the same as 
+    those of 'scattering_by_space'. Otherwise e1 is d and e2 is ε, which
+    gives θ = π - arctan(|n·ε| / |n·d|).
+
+    Parameters
+    ----------
+    scattering_point : np.array (x, y, z)
+        The point at which the incident light is scattered.
+    observation_points : np.array
+        A (..., 3) array of the points at which the scattered light is 
+        observed.
+    wavevector_origin : np.array (x, y, z)
+        The initial point of the wavevector of the incident light. The 
+        terminal point is 'scattering_point', and the magnitude of the
+        wavevector is the distance between them.
+    observation_time : float
+        The time at which the scattered light is observed. This should
+        be described in seconds. 
+    wave_amplitude : float
+        The amplitude of incident light's electric field. This should
+        be described in volts/meter.
+    polarization_of_electric_field : str or np.array, [{"z", "x", "y"}, optional]
+        The dimension, or the (x, y, z) direction, in which the electric 
+        field is polarized. Only its component perpendicular to the 
+        direction of the incident light is used.
+    returned_value : str, [{"amplitude", "phase", "complex", "real", "imaginary", "amplitude/cos"}, optional]
+        The part of the scattered wave to be returned, see 
+        'scattering_by_angle'.
+    
+    Returns
+    -------
+    np.array
+        The requested part of the scattered field at each point of 
+        observation, with the shape of 'observation_points' without its
+        last dimension.
+
+    Raises
+    ------
+    ValueError
+        If the polarization is parallel to the direction of the incident
+        light.
+    """
+    scattering_point = np.asarray(scattering_point, dtype=float)
+    observation_points = np.asarray(observation_points, dtype=float)
+    wavevector = scattering_point - np.asarray(wavevector_origin, dtype=float)
+    wavenumber = np.linalg.norm(wavevector) #magnitude of the wavevector
+    wavelength = wc.convert(wavenumber, "wavenumber", "wavelength")
+    incident_direction = wavevector / wavenumber
+
+    if isinstance(polarization_of_electric_field, str):
+        polarization = np.zeros(3)
+        polarization[index_by_dimension[polarization_of_electric_field]] = 1
+    else:
+        polarization = np.asarray(polarization_of_electric_field, dtype=float)
+    polarization = polarization - np.dot(polarization, incident_direction) * incident_direction
+    if np.linalg.norm(polarization) < 1e-12:
+        raise ValueError("The polarization of the electric field should not be parallel to the direction of the wave")
+    polarization /= np.linalg.norm(polarization)
+
+    if isinstance(polarization_of_electric_field, str) and np.count_nonzero(wavevector) == 1:
+        #The plane of the incident light is spanned by two axes, which 'scattering_by_space' takes in (x, y, z) order
+        first_axis, second_axis = np.eye(3)[sorted((index_by_dimension[polarization_of_electric_field], int(np.flatnonzero(wavevector)[0])))]
+    else:
+        first_axis, second_axis = incident_direction, polarization
+
+    def get_slopes(vectors):
+        rise, run = vectors @ second_axis, vectors @ first_axis
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(run == 0, np.inf, rise / run)
+
+    displacements = observation_points - scattering_point
+    distances_from_scattering = np.hypot.reduce(displacements, axis=-1)
+    with np.errstate(invalid="ignore"):
+        angles_of_observation = np.pi - np.abs(np.arctan(get_slopes(wavevector) - get_slopes(displacements)))
+
+    return scattering_by_angle(angles_of_observation, distances_from_scattering, observation_time, wavelength, wave_amplitude, returned_value=returned_value)
+
 radius_by_shell = {'k': 0.02, 'l':0.16} #in nanometers
-@njit()
+@njit(cache=True)
 def electron_probability(distance_from_atom, electron_shell:str):
     if electron_shell == 'k':
         electron_distance = 0.02
@@ -178,27 +305,223 @@ def electron_probability(distance_from_atom, electron_shell:str):
     return nanometer_value
 
 def check_electron_probability():
+    from scipy import integrate
     prob = integrate.quad(lambda r: 4 * np.pi * r **2 * electron_probability(r, 'k'), 0, np.inf)
     assert np.isclose(1, prob)[0] #The function should integrate to one if you do things correctly
 
-@njit()
+@njit(cache=True)
 def integrable_function(angle_of_observation, subatomic_distance, offset=0, incident_field_strength=1, wavelength=1, observation_time=0, electron_shell='k', returned_value="real"):
+    """The integrand of 'scattering_from_atom', with the distances and
+    wavelength in nanometers. 'returned_value' is either "real" or 
+    "imaginary"."""
     spherical_integral_conversion = (subatomic_distance+offset)**2 * np.sin(angle_of_observation)
     positional_probability = 4 * np.pi * subatomic_distance**2 * electron_probability(subatomic_distance, electron_shell)
-    return scattering_by_angle(angle_of_observation, subatomic_distance+offset, observation_time, wavelength, incident_field_strength, returned_value=returned_value) * spherical_integral_conversion * positional_probability
+    field = scattered_field(angle_of_observation, (subatomic_distance+offset)*1e-9, observation_time, wavelength*1e-9, incident_field_strength) * spherical_integral_conversion * positional_probability
+    if returned_value == "real":
+        return field.real
+    elif returned_value == "imaginary":
+        return field.imag
+    else:
+        raise ValueError("returned_value must be either real, or imaginary")
+
+def analytic_radial_scattering_from_atom(incident_field_strength, wavelength, observation_time, electron_shell:str='k', offset=0):
+    """ Returns the closed form solution of the radial part of the 
+    integral computed numerically by 'scattering_from_atom', which is 
+    the field the atom would scatter if the angular part were one. Each
+    of the numerical parameters can be a numpy array, in which case they
+    are broadcast against each other.
+
+    Notes
+    -----
+    With a = radius_by_shell[electron_shell], k = 2π/wavelength, and
+    b = 2/a - ik, the radial part is
+
+    ∫ (r+offset) r² (4/a³) exp(-br) dr = (4/a³) (6/b⁴ + 2·offset/b³)
+
+    over 0..∞. As in 'analytic_atom_scattering', the wavelength and 
+    offset are in nanometers.
+    """
+    electron_distance = radius_by_shell[electron_shell]
+    wavenumber = 2*np.pi/np.asarray(wavelength, dtype=float)
+    angular_frequency = 2*np.pi*constants.speed_of_light/(np.asarray(wavelength, dtype=float)*1e-9)
+    decay = 2/electron_distance - 1j*wavenumber
+
+    radial_integral = (4/electron_distance**3) * (6/decay**4 + 2*offset/decay**3)
+    phase = wavenumber*offset - angular_frequency*observation_time
+    return incident_field_strength * classical_electron_radius * 1e9 * np.exp(1j*phase) * radial_integral
+
+def analytic_scattering_from_atom(incident_field_strength, wavelength, observation_time, electron_shell:str='k', offset=0):
+    """ Returns the closed form solution of the integral computed 
+    numerically by 'scattering_from_atom'. Each of the numerical 
+    parameters can be a numpy array, in which case they are broadcast 
+    against each other.
+
+    Notes
+    -----
+    The integrand separates into a radial part, see 
+    'analytic_radial_scattering_from_atom', and an angular part, the 
+    integral of cos(θ)sin(θ) over 0..π, which vanishes. The returned 
+    values are therefore always zero.
+    """
+    angular_integral = 0 # The integral of cos(θ)sin(θ) over 0..π
+    return analytic_radial_scattering_from_atom(incident_field_strength, wavelength, observation_time, electron_shell, offset) * angular_integral
+
+def scattering_from_atom(incident_field_strength, wavelength, observation_time, electron_shell:str='k', offset=0, mode="numerical"):
+    """ Returns the field scattered by the electron cloud of an atom,
+    integrated over the cloud's radius, from 0 to infinity, and over the
+    angle of observation, from 0 to π.
+
+    Parameters
+    ----------
+    incident_field_strength : float
+        The amplitude of the incident light's electric field, in
+        volts/meter.
+    wavelength : float
+        The wavelength of the incident light, in nanometers.
+    observation_time : float
+        The time at which the scattered light is observed, in seconds.
+    electron_shell : {"k", "l"}, optional
+        The electron shell of the scattering electron.
+    offset : float, optional
+        The distance between the atom and the point of observation, in
+        nanometers.
+    mode : {"numerical", "analytic", "quadrature"}, optional
+        Whether the integral is computed with scipy's 'dblquad', with
+        the closed form of 'analytic_scattering_from_atom', or with 
+        the fixed nodes of 'atom_quadrature.AtomQuadrature'.
 
-def scattering_from_atom(incident_field_strength, wavelength, observation_time, electron_shell:str='k', offset=0):
+    Returns
+    -------
+    complex
+        The field scattered by the atom.
+
+    Notes
+    -----
+    The wavelength and offset are in nanometers, as in 
+    'analytic_atom_scattering' and 'angle_free_atom_scattering', since
+    the electron cloud of 'electron_probability' is measured in 
+    nanometers.
+    """
+    if mode == "analytic":
+        return analytic_scattering_from_atom(incident_field_strength, wavelength, observation_time, electron_shell, offset)
+    elif mode == "quadrature":
+        from atom_quadrature import get_atom_quadrature #Imported here, as atom_quadrature imports this module
+        return get_atom_quadrature(electron_shell)(incident_field_strength, wavelength, observation_time, offset)
+    elif mode != "numerical":
+        raise ValueError("mode must be either numerical, analytic, or quadrature")
+
+    from scipy import integrate #scipy.integrate is only imported when it's needed, as it's slow to import
     real_integral, real_err = integrate.dblquad(integrable_function, 0, np.inf, 0, np.pi, args=(offset, incident_field_strength, wavelength, observation_time, electron_shell, "real"))
     imaginary_integral, imag_err = integrate.dblquad(integrable_function, 0, np.inf, 0, np.pi, args=(offset, incident_field_strength, wavelength, observation_time, electron_shell, "imaginary"))
     return real_integral + imaginary_integral*1j
 
-def angle_free_atom_scattering(incident_field_strength, wavelength, observation_time, electron_shell:str='k', offset=0):
+def analytic_atom_scattering(incident_field_strength, wavelength, observation_time, electron_shell:str='k', offset=0):
+    """ Returns the closed form solution of the integral computed 
+    numerically by 'angle_free_atom_scattering'. Each of the numerical 
+    parameters can be a numpy array, in which case they are broadcast 
+    against each other.
+
+    Parameters
+    ----------
+    incident_field_strength : float or np.array
+        The amplitude of the incident light's electric field, in
+        volts/meter.
+    wavelength : float or np.array
+        The wavelength of the incident light, in nanometers.
+    observation_time : float or np.array
+        The time at which the scattered light is observed, in seconds.
+    electron_shell : {"k", "l"}, optional
+        The electron shell of the scattering electron.
+    offset : float or np.array, optional
+        The distance between the atom and the point of observation, in
+        nanometers.
+
+    Returns
+    -------
+    complex or np.array of complex
+        The field scattered by the atom.
+
+    Notes
+    -----
+    With a = radius_by_shell[electron_shell], k = 2π/wavelength, and
+    b = 2/a - ik, the integrand is proportional to 
+    (r+offset) exp(-br) exp(ik·offset), so that
+
+    ∫ (r+offset) (4/a³) exp(-br) dr = (4/a³) (1/b² + offset/b)
+
+    over 0..∞.
+    """
+    electron_distance = radius_by_shell[electron_shell]
+    wavenumber = 2*np.pi/np.asarray(wavelength, dtype=float)
+    angular_frequency = 2*np.pi*constants.speed_of_light/(np.asarray(wavelength, dtype=float)*1e-9)
+    decay = 2/electron_distance - 1j*wavenumber
+
+    radial_integral = (4/electron_distance**3) * (1/decay**2 + offset/decay)
+    phase = wavenumber*offset - angular_frequency*observation_time
+    return incident_field_strength * classical_electron_radius * 1e9 * np.exp(1j*phase) * radial_integral
+
+def angle_free_atom_scattering(incident_field_strength, wavelength, observation_time, electron_shell:str='k', offset=0, mode="numerical"):
+    """ Returns the field scattered by the electron cloud of an atom in
+    the forward direction, integrated over the cloud's radius, from 0 to
+    infinity, as in 'scattering_from_atom'. The parameters are those of
+    'analytic_atom_scattering', which 'mode' "analytic" returns instead
+    of the numerical integral.
+
+    Notes
+    -----
+    The relative tolerance of the numerical integral is the larger of
+    scipy's default and ten times the phase error of rounding the 
+    distances to floats near the offset, as the integral can't be more
+    accurate than that. For an offset of 1e9 nanometers and a 
+    wavelength of 0.1 nanometers, this is about 1e-4.
+    """
+    if mode == "analytic":
+        return analytic_atom_scattering(incident_field_strength, wavelength, observation_time, electron_shell, offset)
+    elif mode != "numerical":
+        raise ValueError("mode must be either numerical, or analytic")
+
+    #The electron cloud is only a fraction of a nanometer wide, so the integral is split where its density becomes negligible for quad to resolve it
+    cloud_radius = radius_by_shell[electron_shell] * 50
+    #The distances are rounded to the spacing of floats around the offset, which limits the accuracy of their phase, and of the integral
+    relative_tolerance = max(1.49e-8, 10 * 2*np.pi/wavelength * np.spacing(float(offset) + cloud_radius))
     integratable_func = lambda r: scattering_by_angle(0, (r+offset)*1e-9, observation_time, wavelength*1e-9, incident_field_strength, returned_value="complex") * electron_probability(r, electron_shell) * 4 * np.pi * ((r+offset))**2
-    real_integral = integrate.quad(lambda r: integratable_func(r).real, 0, 1000)
-    imaginary_integral = integrate.quad(lambda r: integratable_func(r).imag, 0, 1000)
-    complex_integral = real_integral[0] + imaginary_integral[0] * 1j
+    from scipy import integrate
+    complex_integral = 0
+    for start, stop in ((0, cloud_radius), (cloud_radius, np.inf)):
+        real_integral = integrate.quad(lambda r: integratable_func(r).real, start, stop, limit=200, epsrel=relative_tolerance)
+        imaginary_integral = integrate.quad(lambda r: integratable_func(r).imag, start, stop, limit=200, epsrel=relative_tolerance)
+        complex_integral += real_integral[0] + imaginary_integral[0] * 1j
     return complex_integral
 
+def check_analytic_atom_scattering():
+    for electron_shell in radius_by_shell:
+        for wavelength in (0.1, 1):
+            for offset in (0, 0.05, 10, 1e9):
+                numerical = angle_free_atom_scattering(1, wavelength, 0, electron_shell, offset)
+                analytic = analytic_atom_scattering(1, wavelength, 0, electron_shell, offset)
+                assert np.isclose(numerical, analytic, rtol=1e-4, atol=0) #The closed form should agree with the numerical integral
+
+def check_scattering_by_points():
+    random_generator = np.random.default_rng(0)
+    scattering_point = np.array([3.0, 2.0, 4.0])
+    observation_points = random_generator.uniform(-10, 10, (200, 3))
+    for wavevector_origin, polarization in (((3, -5, 4), 'z'), ((3, 2, -3), 'x'), ((-2, 2, 4), 'y'), ((3, 9, 4), 'x')):
+        for returned_value in ("amplitude", "phase"):
+            batched = scattering_by_points(scattering_point, observation_points, wavevector_origin, 1e-18, 2, polarization, returned_value)
+            scalar = [scattering_by_space(scattering_point, observation_point, wavevector_origin, 1e-18, 2, polarization, returned_value) for observation_point in observation_points]
+            assert np.allclose(batched, scalar, rtol=1e-9, atol=0)
+
+def check_analytic_scattering_from_atom():
+    for electron_shell in radius_by_shell:
+        for wavelength in (0.1, 1):
+            for offset in (0, 0.05, 10):
+                analytic = analytic_scattering_from_atom(1, wavelength, 0, electron_shell, offset)
+                #The closed form is zero, so the numerical integral is compared to the size of its radial part
+                field_scale = abs(analytic_radial_scattering_from_atom(1, wavelength, 0, electron_shell, offset))
+                for mode in ("numerical", "quadrature"):
+                    numerical = scattering_from_atom(1, wavelength, 0, electron_shell, offset, mode)
+                    assert np.isclose(numerical, analytic, rtol=0, atol=1e-6*field_scale)
+
 if __name__ == "__main__":
     """ This script is not really meant to be ran on it's own - this bit of code just allows you to graph different variables of the function
     for the purpose of debugging."""
@@ -0,0 +1,129 @@
+import math
+import os
+
+import numpy as np
+
+from tqdm import tqdm
+
+def get_tile_size(memory_budget:int, bytes_per_point:int) -> int:
+    """Returns the side length of the largest square tile whose
+    evaluation fits in 'memory_budget'.
+
+    Parameters
+    ----------
+    memory_budget : int
+        The number of bytes a single tile may use while it is evaluated.
+    bytes_per_point : int
+        The number of bytes used to evaluate a single point of a tile.
+
+    Returns
+    -------
+    int
+        The side length of the tile, in points. This is always at least 1.
+    """
+    return max(1, math.isqrt(memory_budget // bytes_per_point))
+
+def get_tiles(grid_shape:'tuple[int, int]', tile_size:int) -> list:
+    """Returns the tiles covering a 2d grid, in row major order.
+
+    Parameters
+    ----------
+    grid_shape : tuple of int (rows, columns)
+        The shape of the grid to split into tiles.
+    tile_size : int
+        The side length of each tile. Tiles on the last row and column
+        of the grid may be smaller.
+
+    Returns
+    -------
+    list of tuple of slice (rows, columns)
+        The index of each tile into the grid.
+    """
+    tiles = []
+    for row_start in range(0, grid_shape[0], tile_size):
+        for col_start in range(0, grid_shape[1], tile_size):
+            tiles.append((slice(row_start, min(row_start+tile_size, grid_shape[0])), slice(col_start, min(col_start+tile_size, grid_shape[1]))))
+    return tiles
+
+def get_progress_path(path:str) -> str:
+    """Returns the path of the file recording which tiles of the image at
+    'path' have been rendered."""
+    return path + ".tiles.npz"
+
+def save_progress(path:str, completed_tiles:np.array, render_key:str) -> None:
+    """Saves which tiles of the image at 'path' have been rendered, and
+    the key of the render they belong to. The file is replaced
+    atomically, so it is never left half written."""
+    progress_path = get_progress_path(path)
+    with open(progress_path + ".tmp", "wb") as progress_file:
+        np.savez(progress_file, completed_tiles=completed_tiles, render_key=np.array(render_key))
+    os.replace(progress_path + ".tmp", progress_path)
+
+def load_progress(path:str) -> 'tuple[np.array, str]':
+    """Returns which tiles of the image at 'path' have been rendered, and
+    the key of the render they belong to, as saved by 'save_progress'."""
+    with np.load(get_progress_path(path)) as progress:
+        return progress["completed_tiles"], str(progress["render_key"])
+
+def render_tiles(path:str, evaluate_tile:'function', grid_shape:'tuple[int, int]', memory_budget:int, bytes_per_point:int, dtype=np.float64, render_key:str="") -> np.memmap:
+    """Renders a 2d image tile by tile into a memory-mapped .npy file.
+
+    After each tile is written, it is recorded as complete in a file
+    next to the image. If rendering is interrupted, calling this function
+    again with the same arguments only renders the remaining tiles. The
+    record is deleted once every tile has been rendered.
+
+    The record also stores 'render_key'. If the image, the tiles or the
+    key don't match the ones recorded, the image is rendered again from
+    the start, so that tiles of different renders are never mixed.
+
+    Parameters
+    ----------
+    path : str
+        The path of the .npy file to render into.
+    evaluate_tile : function(slice, slice)
+        A function which returns the values of the image at the passed
+        row and column slices of the grid.
+    grid_shape : tuple of int (rows, columns)
+        The shape of the image.
+    memory_budget : int
+        The number of bytes a single tile may use while it is evaluated.
+    bytes_per_point : int
+        The number of bytes 'evaluate_tile' uses for a single point.
+    dtype : np.dtype, optional
+        The data type of the image.
+    render_key : str, optional
+        A key which identifies everything the image depends on, such as
+        one made by 'render_cache.get_cache_key'.
+
+    Returns
+    -------
+    np.memmap
+        The rendered image, memory-mapped from 'path'.
+    """
+    tiles = get_tiles(grid_shape, get_tile_size(memory_budget, bytes_per_point))
+    progress_path = get_progress_path(path)
+
+    completed_tiles = None
+    if os.path.exists(path) and os.path.exists(progress_path):
+        image = np.lib.format.open_memmap(path, mode="r+")
+        completed_tiles, saved_render_key = load_progress(path)
+        if image.shape != tuple(grid_shape) or image.dtype != dtype or len(completed_tiles) != len(tiles) or saved_render_key != render_key:
+            del image
+            completed_tiles = None
+
+    if completed_tiles is None:
+        image = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=tuple(grid_shape))
+        completed_tiles = np.zeros(len(tiles), dtype=bool)
+        save_progress(path, completed_tiles, render_key)
+
+    for tile_ind in tqdm(np.flatnonzero(~completed_tiles)):
+        rows, cols = tiles[tile_ind]
+        image[rows, cols] = evaluate_tile(rows, cols)
+        image.flush()
+
+        completed_tiles[tile_ind] = True
+        save_progress(path, completed_tiles, render_key)
+
+    os.remove(progress_path)
+    return image
@@ -1,9 +1,6 @@
-import matplotlib.pyplot as plt
-from mayavi import mlab
-
 import numpy as np
 
-import scipy.integrate as integrate
+#The plotting backends and scipy are imported by the functions which use them, so that importing this module doesn't need a display
 
 def rgb_to_mayavi(r:int, g:int, b:int) -> tuple:
     """Returns the passed integer R, G, and B values as a tuple of floats
@@ -31,6 +28,7 @@ def add_graph_to_plot(func:'function', min:float, max:float, num_samples:int, co
     for i, x in enumerate(x_values):
         y_values[i] = func(x)
     
+    import matplotlib.pyplot as plt
     plt.plot(x_values, y_values,  color=color)
 
 def graph_function(func:'function', min:float, max:float, num_samples:int, title=None, x_label=None, y_label=None) -> None:
@@ -63,6 +61,7 @@ def graph_function(func:'function', min:float, max:float, num_samples:int, title
     This function uses matplotlib, which is not listed as a requirement
     in this project. To install matplotlib just use pip install matplotlib
     """    
+    import matplotlib.pyplot as plt
     add_graph_to_plot(func, min, max, num_samples)
 
     if title != None:
@@ -86,11 +85,13 @@ def graph_3d_function(func, min:float, max:float, num_side_points:float, x_label
             z_points[y_i][x_i] = func(evenly_spaced_arr[x_i], evenly_spaced_arr[y_i])
 
     print(z_points.shape)
+    from mayavi import mlab
     mlab.surf(z_points, warp_scale='auto')
     mlab.axes(xlabel=x_label, ylabel=y_label, zlabel=z_label)
     mlab.show()
 
 def integrate_function_simpson(func, min, max, num_samples):
+    import scipy.integrate as integrate
     x_values = np.linspace(min, max, num_samples)
     y_values = np.zeros(x_values.shape)
     for i, x in enumerate(x_values):
@@ -0,0 +1,65 @@
+""" Compiles every numba kernel of the simulation for each signature it's
+used with, so that the compiled code is written to numba's on-disk cache.
+Run this script once after installing or changing the code, before the
+simulation is deployed, so that no process pays for the compilation on
+its first call.
+
+The cache is written to the __pycache__ directory next to each module,
+or to the directory in the NUMBA_CACHE_DIR environment variable. """
+
+import time
+
+import numpy as np
+
+def get_warmup_calls() -> list:
+    """Returns a list of (name, function) pairs, where each function calls
+    a kernel with one of the signatures the simulation uses."""
+    import atom_quadrature
+    import diffraction_kernels
+    import thomson_scattering
+    import wave_conversions as wc
+
+    points = np.zeros((2, 2))
+    atom_phasors = np.ones(2, dtype=complex)
+    observation_points = np.ones((2, 2))
+    observation_points_3d = np.ones((2, 3))
+
+    warmup_calls = [
+        ("wave_conversions.convert", lambda: [wc.convert(1e-9, "wavelength", unit) for unit in wc.unit_codes]),
+        ("wave_conversions.convert_kernel", lambda: wc.convert_array(np.array([1e-9]), "wavelength", tuple(wc.unit_codes))),
+        ("thomson_scattering.electron_probability", lambda: (thomson_scattering.electron_probability(0.01, 'k'), thomson_scattering.electron_probability(np.array([0.01]), 'k'))),
+        ("thomson_scattering.scattering_by_angle", lambda: [thomson_scattering.scattering_by_angle(angle, 1e-9, 0, 1e-10, 1, returned_value) for angle in (0.0, np.array([0.0]))
+                                                            for returned_value in ("amplitude/cos", "complex")]),
+        #scattering_by_points passes float arrays to the ufuncs, with the time and amplitude it's passed
+        ("thomson_scattering.scattering_by_points", lambda: [thomson_scattering.scattering_by_points((1, 0, 0), observation_points_3d, (0, 0, 0), observation_time, wave_amplitude, 'z', returned_value)
+                                                             for observation_time, wave_amplitude in ((0, 1), (0.0, 1.0)) for returned_value in ("amplitude/cos", "complex")]),
+        #AtomQuadrature converts every parameter to float64
+        ("atom_quadrature.AtomQuadrature", lambda: atom_quadrature.get_atom_quadrature('k')(1, 0.1, 0)),
+        ("thomson_scattering.integrable_function", lambda: [thomson_scattering.integrable_function(0.0, 0.01, 0.0, 1, 0.1, 0.0, 'k', returned_value) for returned_value in ("real", "imaginary")]),
+        ("diffraction_kernels.atom_scattering_kernel", lambda: diffraction_kernels.atom_scattering_kernel(1.0, 1.0, 0.02)),
+        ("diffraction_kernels.lattice_phasor_sum", lambda: diffraction_kernels.lattice_phasor_sum(points, atom_phasors, observation_points, 1.0, 0.02)),
+    ]
+    return warmup_calls
+
+def warmup() -> dict:
+    """Calls every kernel with each signature the simulation uses, which
+    compiles it, or loads it from the cache if it was already compiled.
+
+    Returns
+    -------
+    dict of float
+        The time, in seconds, each kernel took to compile or load.
+    """
+    times = {}
+    for name, call in get_warmup_calls():
+        start = time.perf_counter()
+        call()
+        times[name] = time.perf_counter() - start
+    return times
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    times = warmup()
+    for name, elapsed in times.items():
+        print(f"{name}: {elapsed:.3g}s")
+    print(f"Total: {time.perf_counter() - start:.3g}s")
@@ -1,11 +1,11 @@
 from scipy import constants
 import numpy as np
 
-from numba import jit, njit
+from numba import jit, njit, vectorize
 
 import sys
 
-@jit(nopython=True)
+@jit(nopython=True, cache=True)
 def freq_from_angular_frequency(angular_frequency:float) -> float:
     """Returns the linear frequency of a wave based on it's angular 
     frequency.
@@ -25,7 +25,7 @@ def freq_from_angular_frequency(angular_frequency:float) -> float:
 
     return angular_frequency/2*np.pi
     
-@jit(nopython=True)
+@jit(nopython=True, cache=True)
 def freq_from_wavenumber(wavenumber:float):
     """Returns the linear frequency of a wave based on it's wavenumber.
 
@@ -45,7 +45,7 @@ def freq_from_wavenumber(wavenumber:float):
     wavelength = 2*np.pi/wavenumber
     return freq_from_wavelength(wavelength)
 
-@jit(nopython=True)
+@jit(nopython=True, cache=True)
 def freq_from_wavelength(wavelength:float):
     """Returns the linear frequency of a light wave based on it's 
     wavelength.
@@ -64,7 +64,7 @@ def freq_from_wavelength(wavelength:float):
 
     return constants.speed_of_light / wavelength
 
-@jit(nopython=True)
+@jit(nopython=True, cache=True)
 def freq_from_time_period(time_period:float):
     """Returns the linear frequency of a wave based on it's time period.
 
@@ -82,7 +82,7 @@ def freq_from_time_period(time_period:float):
     """    
     return 1/time_period
 
-@jit(nopython=True)
+@jit(nopython=True, cache=True)
 def freq_from_photon_energy(photon_energy:float):
     """Returns the linear frequency of a wave based on it's photon energy.
 
@@ -100,7 +100,7 @@ def freq_from_photon_energy(photon_energy:float):
     """    
     return constants.Planck/photon_energy
 
-@jit(nopython=True)
+@jit(nopython=True, cache=True)
 def angular_frequency_from_freq(frequency:float):
     """Returns the angular frequency of a wave based on it's linear frequency.
 
@@ -119,7 +119,7 @@ def angular_frequency_from_freq(frequency:float):
 
     return 2*np.pi*frequency
 
-@jit(nopython=True)
+@jit(nopython=True, cache=True)
 def time_period_from_freq(frequency:float):
     """Returns the time period of a wave based on it's frequency.
 
@@ -138,7 +138,7 @@ def time_period_from_freq(frequency:float):
     
     return 1/frequency
 
-@jit(nopython=True)
+@jit(nopython=True, cache=True)
 def photon_energy_from_freq(frequency:float):
     """Returns the photon energy of a wave based on it's frequency.
 
@@ -157,7 +157,7 @@ def photon_energy_from_freq(frequency:float):
 
     return constants.Planck * frequency
 
-@jit(nopython=True)
+@jit(nopython=True, cache=True)
 def wavelength_from_freq(frequency:float):
     """Returns the wavelength of a wave based on it's frequency.
 
@@ -176,7 +176,7 @@ def wavelength_from_freq(frequency:float):
 
     return constants.speed_of_light / frequency
 
-@jit(nopython=True)
+@jit(nopython=True, cache=True)
 def wavenumber_from_freq(frequency:float):
     """Returns the wavenumber of a wave based on it's frequency.
 
@@ -196,7 +196,7 @@ def wavenumber_from_freq(frequency:float):
     wavelength = wavelength_from_freq(frequency)
     return 2*np.pi/wavelength
 
-@njit()
+@njit(cache=True)
 def convert(value:float, unit:str, converted_unit:str):
     """Returns the equivalent value of unit a, with unit type b
 
@@ -257,4 +257,98 @@ def convert(value:float, unit:str, converted_unit:str):
     elif converted_unit == "frequency":
         return intermediate_value
     else:
-        raise ValueError("Could not interpret the passed unit to convert to")
\ No newline at end of file
+        raise ValueError("Could not interpret the passed unit to convert to")
+
+unit_codes = {"frequency":0, "angular_frequency":1, "time_period":2, "photon_energy":3, "wavelength":4, "wavenumber":5}
+""" The integer code of each unit 'convert_kernel' supports """
+
+@njit(cache=True)
+def freq_from_unit_code(value:float, unit_code:int) -> float:
+    """Returns the linear frequency of a wave from 'value', which is in
+    the unit with 'unit_code'. See 'convert'."""
+    if unit_code == 1:
+        return freq_from_angular_frequency(value)
+    elif unit_code == 2:
+        return freq_from_time_period(value)
+    elif unit_code == 3:
+        return freq_from_photon_energy(value)
+    elif unit_code == 4:
+        return freq_from_wavelength(value)
+    elif unit_code == 5:
+        return freq_from_wavenumber(value)
+    elif unit_code == 0:
+        return value
+    return np.nan
+
+@njit(cache=True)
+def unit_code_from_freq(frequency:float, unit_code:int) -> float:
+    """Returns the value of a wave with a linear frequency of 'frequency'
+    in the unit with 'unit_code'. See 'convert'."""
+    if unit_code == 1:
+        return angular_frequency_from_freq(frequency)
+    elif unit_code == 2:
+        return time_period_from_freq(frequency)
+    elif unit_code == 3:
+        return photon_energy_from_freq(frequency)
+    elif unit_code == 4:
+        return wavelength_from_freq(frequency)
+    elif unit_code == 5:
+        return wavenumber_from_freq(frequency)
+    elif unit_code == 0:
+        return frequency
+    return np.nan
+
+#Without a signature this is only compiled when it's first called, rather than on import
+@vectorize(cache=True)
+def convert_kernel(value, unit_code, converted_unit_code):
+    """A ufunc which converts each of 'value' from the unit with
+    'unit_code' to the unit with 'converted_unit_code', see 'unit_codes'.
+    Unknown unit codes give NaN."""
+    return unit_code_from_freq(freq_from_unit_code(value, unit_code), converted_unit_code)
+
+def get_unit_codes(units:'str | tuple[str]') -> np.array:
+    """Returns the code in 'unit_codes' of a unit, or an array of the
+    codes of a sequence of units.
+
+    Raises
+    ------
+    ValueError
+        If any of the units isn't in 'unit_codes'.
+    """
+    try:
+        if isinstance(units, str):
+            return np.int64(unit_codes[units])
+        return np.array([unit_codes[unit] for unit in units], dtype=np.int64)
+    except KeyError as error:
+        raise ValueError(f"Could not interpret the unit {error.args[0]}") from None
+
+def convert_array(values:np.array, unit:'str | tuple[str]', converted_unit:'str | tuple[str]') -> np.array:
+    """Returns the equivalent of each of 'values' in another unit, with
+    the same result as calling 'convert' on each value.
+
+    Parameters
+    ----------
+    values : np.array
+        The values to convert, in the base SI unit of 'unit'.
+    unit : str or sequence of str
+        The unit of 'values', see 'convert'. A sequence gives the unit of
+        each value along the last dimension of 'values'.
+    converted_unit : str or sequence of str
+        The unit to convert the values to. A sequence converts the values
+        to each of the units, along a last dimension which broadcasts
+        against 'values'.
+
+    Returns
+    -------
+    np.array
+        The converted values, with the broadcast shape of 'values' and the
+        units.
+
+    Examples
+    --------
+    The wavenumber, angular frequency and time period of a wavelength 
+    can be computed in a single call
+
+    >>> wavenumber, angular_frequency, time_period = convert_array(wavelength, "wavelength", ("wavenumber", "angular_frequency", "time_period"))
+    """
+    return convert_kernel(np.asarray(values, dtype=np.float64), get_unit_codes(unit), get_unit_codes(converted_unit))
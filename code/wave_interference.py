@@ -22,9 +22,7 @@ class Wave:
     def set_wavelength(self, wavelength:float):
         self.wavelength = wavelength
 
-        self.wavenumber = wc.convert(wavelength, "wavelength", "wavenumber")
-        self.angular_freq = wc.convert(wavelength, "wavelength", "angular_frequency")
-        self.time_period = wc.convert(wavelength, "wavelength", "time_period")
+        self.wavenumber, self.angular_freq, self.time_period = wc.convert_array(wavelength, "wavelength", ("wavenumber", "angular_frequency", "time_period"))
 
 class ComponentWave(Wave):
     def __init__(self, wavelength:float, added_phase:float, amplitude:float=1) -> None:
@@ -57,9 +55,7 @@ class CompositeWave(Wave):
     
 
 def generate_wave_function(wavelength:float, added_phase:float):
-    wavenumber = wc.convert(wavelength, "wavelength", "wavenumber")
-    angular_freq = wc.convert(wavelength, "wavelength", "angular_frequency")
-    time_period = wc.convert(wavelength, "wavelength", "time_period")
+    wavenumber, angular_freq, time_period = wc.convert_array(wavelength, "wavelength", ("wavenumber", "angular_frequency", "time_period"))
 
     return lambda t: np.exp(1j * (wavenumber*t+added_phase - angular_freq*time_period))
 